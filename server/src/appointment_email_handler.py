@@ -8,6 +8,9 @@ from gmail_service import get_gmail_service
 
 logger = logging.getLogger(__name__)
 
+# SEND_EMAIL: recipient_email|patient_name|appointment_date|doctor_name|department_name|phone_number
+_SEND_EMAIL_RE = re.compile(r'SEND_EMAIL:\s*([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|\n]+)', re.IGNORECASE)
+
 class AppointmentEmailHandler:
     """Handles automatic appointment confirmation email sending"""
 
@@ -22,9 +25,8 @@ class AppointmentEmailHandler:
     def extract_email_confirmation_data(self, text: str) -> Optional[Dict[str, Any]]:
         """Extract email confirmation data from AI response text"""
         try:
-            # Look for SEND_EMAIL pattern: SEND_EMAIL: recipient_email|patient_name|appointment_date|doctor_name|department_name|phone_number
-            pattern = r'SEND_EMAIL:\s*([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|\n]+)'
-            match = re.search(pattern, text, re.IGNORECASE)
+            # Look for the SEND_EMAIL pattern
+            match = _SEND_EMAIL_RE.search(text)
 
             if not match:
                 return None
@@ -263,8 +265,7 @@ class AppointmentEmailHandler:
                 logger.error(f"Failed to send appointment confirmation: {result['error']}")
 
             # Remove the SEND_EMAIL trigger from the response
-            pattern = r'SEND_EMAIL:\s*([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|([^|\n]+)'
-            cleaned_response = re.sub(pattern, '', ai_response, flags=re.IGNORECASE).strip()
+            cleaned_response = _SEND_EMAIL_RE.sub('', ai_response).strip()
 
             return cleaned_response, result
 
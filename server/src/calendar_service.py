@@ -1,19 +1,148 @@
 #!/usr/bin/env python3
 
 import os
+import re
+import time
+import asyncio
+import functools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from zoneinfo import ZoneInfo
 from dataclasses import dataclass
+from itertools import islice
 
+import numpy as np
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from googel_auth_manger import get_credentials
+from googel_auth_manger import get_credentials, authorized_request_builder
+
+try:
+    # C parser for the RFC 3339 timestamps the Calendar API returns
+    from ciso8601 import parse_datetime as _parse_event_datetime
+except ImportError:
+    def _parse_event_datetime(value: str) -> datetime:
+        """Parse a Calendar API timestamp into an aware datetime"""
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Hospital timezone; appointment datetimes are parsed as aware datetimes in it
+_IST = ZoneInfo('Asia/Kolkata')
+
+# Accepted appointment date formats as one alternation, tried left to right
+_DATE_RE = re.compile(
+    r'\s*(?:'
+    r'(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})'               # 2024-01-15
+    r'|(?P<us_m>\d{1,2})/(?P<us_d>\d{1,2})/(?P<us_y>\d{4})'                # 01/15/2024
+    r'|(?P<name_m>[A-Za-z]+)\s+(?P<name_d>\d{1,2}),\s*(?P<name_y>\d{4})'    # January 15, 2024 / Jan 15, 2024
+    r'|(?P<eu_d>\d{1,2})-(?P<eu_m>\d{1,2})-(?P<eu_y>\d{4})'                # 15-01-2024
+    r')\s*$'
+)
+
+# 14:30, 14:30:00, 2:30 PM, 2:30PM
+_TIME_RE = re.compile(r'(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp][Mm])?$')
+
+_MONTH_NAMES = ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+                'august', 'september', 'october', 'november', 'december')
+_MONTHS = {name: index for index, name in enumerate(_MONTH_NAMES, start=1)}
+_MONTHS.update({name[:3]: index for index, name in enumerate(_MONTH_NAMES, start=1)})
+
+# Worker threads for the async API; 20 matches Google's recommended
+# per-client concurrency for the Calendar API.
+_CALENDAR_IO_POOL = ThreadPoolExecutor(max_workers=20, thread_name_prefix="calendar-io")
+
+# Maximum number of calls the Calendar API accepts in one batch request
+_BATCH_LIMIT = 50
+
+# Calendar event description, filled positionally by _build_event_body
+_EVENT_DESCRIPTION = (
+    "Renova Hospitals Appointment\n"
+    "\n"
+    "Patient: {}\n"
+    "Phone: {}\n"
+    "Email: {}\n"
+    "Doctor: {}\n"
+    "Department: {}\n"
+    "\n"
+    "Automatically scheduled via voice agent."
+).format
+
+# Static parts of every appointment event, shared by reference (never mutated)
+_EVENT_LOCATION = 'Renova Hospitals'
+_EVENT_TIMEZONE = 'Asia/Kolkata'  # India timezone
+_EVENT_COLOR_ID = '2'  # Green color for appointments
+_EVENT_REMINDERS = {
+    'useDefault': False,
+    'overrides': [
+        {'method': 'email', 'minutes': 24 * 60},  # 1 day before
+        {'method': 'popup', 'minutes': 10},       # 10 minutes before
+    ],
+}
+
+# Partial responses: only the event fields this module reads
+_EVENT_FIELDS = 'items(id,summary,description,start/dateTime,start/date,end/dateTime,end/date)'
+_UPCOMING_FIELDS = 'items(id,summary,description,location,start/dateTime,start/date)'
+
+# Seconds a day's event listing is reused before refetching from Google
+_DAY_CACHE_TTL = 10
+_DAY_CACHE_MAX_ENTRIES = 256
+
+def _to_epoch(dt: datetime) -> int:
+    """Unix seconds for a datetime, treating naive values as hospital local time"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_IST)
+    return int(dt.timestamp())
+
+def _format_epoch_time(epoch: int) -> str:
+    """Format unix seconds as a hospital local 12-hour clock time"""
+    return datetime.fromtimestamp(epoch, _IST).strftime('%I:%M %p')
+
+@functools.lru_cache(maxsize=1024)
+def parse_appointment_datetime(date_str: str, time_str: str) -> Optional[datetime]:
+    """Parse appointment date and time strings into datetime object (memoized)"""
+    try:
+        match = _DATE_RE.match(date_str)
+        if not match:
+            logger.error(f"Could not parse date: {date_str}")
+            return None
+
+        year = match['iso_y'] or match['us_y'] or match['name_y'] or match['eu_y']
+        month = match['iso_m'] or match['us_m'] or match['name_m'] or match['eu_m']
+        day = match['iso_d'] or match['us_d'] or match['name_d'] or match['eu_d']
+        if month.isdigit():
+            month = int(month)
+        else:
+            month = _MONTHS.get(month.lower())
+            if month is None:
+                logger.error(f"Could not parse date: {date_str}")
+                return None
+
+        time_match = _TIME_RE.match(time_str.strip())
+        if not time_match:
+            logger.error(f"Could not parse time: {time_str}")
+            return None
+
+        hour, minute, second, meridiem = time_match.groups()
+        hour = int(hour)
+        if meridiem:
+            # 12-hour clock: seconds are not accepted and hour must be 1-12
+            if second or not 1 <= hour <= 12:
+                logger.error(f"Could not parse time: {time_str}")
+                return None
+            hour = hour % 12 + (12 if meridiem.upper() == 'PM' else 0)
+
+        # Combine date and time in the hospital's timezone
+        return datetime(int(year), month, int(day), hour, int(minute), int(second or 0), tzinfo=_IST)
+
+    except Exception as e:
+        logger.error(f"Error parsing appointment datetime: {e}")
+        return None
+
 @dataclass
 class CalendarEvent:
     """Represents a calendar event"""
@@ -31,22 +160,77 @@ class CalendarService:
         self.service = None
         self.calendar_id = 'primary'  # Use primary calendar for hospital appointments
         self.credentials = credentials
+        self._day_cache = {}  # (calendar_id, day_start iso) -> (fetched_at, events)
+        self._calendar_info = None  # Cached get_calendar_info() result
         self._initialize_service()
 
     def _initialize_service(self):
         """Initialize the Google Calendar API service with authentication"""
         try:
             creds = self.credentials if self.credentials else get_credentials()
-            self.service = build('calendar', 'v3', credentials=creds)
+            self.credentials = creds
+            # Per-thread transports, so the async methods below can run requests
+            # concurrently on the shared service object
+            self.service = build('calendar', 'v3', credentials=creds,
+                                 requestBuilder=authorized_request_builder(creds), cache_discovery=False)
 
-            # Test the service by getting calendar info
-            calendar = self.service.calendars().get(calendarId=self.calendar_id).execute()
-            logger.info(f"Calendar service initialized successfully for: {calendar.get('summary', 'Primary Calendar')}")
+            logger.info(f"Calendar service initialized successfully for: {self.calendar_id}")
 
         except Exception as e:
             logger.error(f"Failed to initialize Calendar service: {str(e)}")
             raise
 
+    async def _run_in_pool(self, func, *args, **kwargs):
+        """Run a blocking service method on the calendar I/O pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_CALENDAR_IO_POOL, functools.partial(func, *args, **kwargs))
+
+    async def create_appointment_event_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async variant of create_appointment_event"""
+        return await self._run_in_pool(self.create_appointment_event, *args, **kwargs)
+
+    async def book_with_conflict_check_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async variant of book_with_conflict_check"""
+        return await self._run_in_pool(self.book_with_conflict_check, *args, **kwargs)
+
+    async def check_availability_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async variant of check_availability"""
+        return await self._run_in_pool(self.check_availability, *args, **kwargs)
+
+    async def cancel_appointment_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async variant of cancel_appointment"""
+        return await self._run_in_pool(self.cancel_appointment, *args, **kwargs)
+
+    async def list_upcoming_appointments_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async variant of list_upcoming_appointments"""
+        return await self._run_in_pool(self.list_upcoming_appointments, *args, **kwargs)
+
+    def _build_event_body(self, start_datetime: datetime, patient_name: str, patient_email: str,
+                          patient_phone: str, doctor_name: str, department: str) -> Dict[str, Any]:
+        """Build the Calendar API event resource for an appointment"""
+        # Calculate end time (default 30 minutes)
+        end_datetime = start_datetime + timedelta(minutes=30)
+
+        return {
+            'summary': f'Appointment: {patient_name} - {doctor_name}',
+            'description': _EVENT_DESCRIPTION(patient_name, patient_phone, patient_email,
+                                              doctor_name, department),
+            'location': _EVENT_LOCATION,
+            'start': {
+                'dateTime': start_datetime.isoformat(),
+                'timeZone': _EVENT_TIMEZONE,
+            },
+            'end': {
+                'dateTime': end_datetime.isoformat(),
+                'timeZone': _EVENT_TIMEZONE,
+            },
+            'attendees': [
+                {'email': patient_email},
+            ],
+            'reminders': _EVENT_REMINDERS,
+            'colorId': _EVENT_COLOR_ID,
+        }
+
     def create_appointment_event(self, patient_name: str, patient_email: str, patient_phone: str,
                                appointment_date: str, appointment_time: str,
                                doctor_name: str, department: str) -> Dict[str, Any]:
@@ -63,50 +247,15 @@ class CalendarService:
                     'error': f'Invalid date/time format: {appointment_date} {appointment_time}'
                 }
 
-            # Calculate end time (default 30 minutes)
-            end_datetime = start_datetime + timedelta(minutes=30)
-
-            # Create event object
-            event = {
-                'summary': f'Appointment: {patient_name} - {doctor_name}',
-                'description': f"""
-Renova Hospitals Appointment
-
-Patient: {patient_name}
-Phone: {patient_phone}
-Email: {patient_email}
-Doctor: {doctor_name}
-Department: {department}
-
-Automatically scheduled via voice agent.
-                """.strip(),
-                'location': 'Renova Hospitals',
-                'start': {
-                    'dateTime': start_datetime.isoformat(),
-                    'timeZone': 'Asia/Kolkata',  # India timezone
-                },
-                'end': {
-                    'dateTime': end_datetime.isoformat(),
-                    'timeZone': 'Asia/Kolkata',  # India timezone
-                },
-                'attendees': [
-                    {'email': patient_email},
-                ],
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'email', 'minutes': 24 * 60},  # 1 day before
-                        {'method': 'popup', 'minutes': 10},       # 10 minutes before
-                    ],
-                },
-                'colorId': '2',  # Green color for appointments
-            }
+            event = self._build_event_body(start_datetime, patient_name, patient_email, patient_phone,
+                                           doctor_name, department)
 
             # Create the event
             created_event = self.service.events().insert(
                 calendarId=self.calendar_id,
                 body=event
             ).execute()
+            self._invalidate_day(start_datetime)
 
             logger.info(f"Calendar event created successfully. Event ID: {created_event['id']}")
             logger.info(f"Appointment: {patient_name} with {doctor_name} on {appointment_date} at {appointment_time}")
@@ -136,57 +285,294 @@ Automatically scheduled via voice agent.
                 'error': str(e)
             }
 
-    def _parse_appointment_datetime(self, date_str: str, time_str: str) -> Optional[datetime]:
-        """Parse appointment date and time strings into datetime object"""
+    def _execute_batch(self, requests: List[tuple]) -> Dict[str, Dict[str, Any]]:
+        """Execute (request_id, request) pairs in batches of up to _BATCH_LIMIT"""
+        results = {}
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                results[request_id] = {'success': False, 'error': f"Calendar API error: {exception}"}
+            else:
+                results[request_id] = {'success': True, 'response': response}
+
+        for offset in range(0, len(requests), _BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for request_id, request in requests[offset:offset + _BATCH_LIMIT]:
+                batch.add(request, request_id=request_id)
+            batch.execute()
+
+        return results
+
+    def book_with_conflict_check(self, patient_name: str, patient_email: str, patient_phone: str,
+                                 appointment_date: str, appointment_time: str,
+                                 doctor_name: str, department: str) -> Dict[str, Any]:
+        """Check the slot and create the appointment event in one batched round trip
+
+        The slot listing and the insert go out in the same batch request. If
+        the listing shows any other event in the slot, the new event is deleted
+        again and the result has available=False with alternatives, like
+        check_availability. If only the listing fails, the booking is kept.
+        """
         try:
-            # Common date formats to try
-            date_formats = [
-                "%Y-%m-%d",     # 2024-01-15
-                "%m/%d/%Y",     # 01/15/2024
-                "%B %d, %Y",    # January 15, 2024
-                "%b %d, %Y",    # Jan 15, 2024
-                "%d-%m-%Y",     # 15-01-2024
-            ]
+            if not self.service:
+                raise Exception("Calendar service not initialized")
 
-            # Common time formats to try
-            time_formats = [
-                "%H:%M",        # 14:30
-                "%I:%M %p",     # 2:30 PM
-                "%I:%M%p",      # 2:30PM
-                "%H:%M:%S",     # 14:30:00
-            ]
+            start_datetime = self._parse_appointment_datetime(appointment_date, appointment_time)
+            if not start_datetime:
+                return {
+                    'success': False,
+                    'error': f'Invalid date/time format: {appointment_date} {appointment_time}'
+                }
 
-            parsed_date = None
-            for date_format in date_formats:
-                try:
-                    parsed_date = datetime.strptime(date_str.strip(), date_format).date()
-                    break
-                except ValueError:
-                    continue
+            end_datetime = start_datetime + timedelta(minutes=30)
+            event = self._build_event_body(start_datetime, patient_name, patient_email, patient_phone,
+                                           doctor_name, department)
+            results = self._execute_batch([
+                ('check', self.service.events().list(
+                    calendarId=self.calendar_id,
+                    timeMin=start_datetime.isoformat(),
+                    timeMax=end_datetime.isoformat(),
+                    singleEvents=True,
+                    fields=_EVENT_FIELDS
+                )),
+                ('insert', self.service.events().insert(calendarId=self.calendar_id, body=event)),
+            ])
+            self._invalidate_day(start_datetime)
+
+            if not results['insert']['success']:
+                return {'success': False, 'error': results['insert']['error']}
+            created_event = results['insert']['response']
+
+            if not results['check']['success']:
+                logger.warning(f"Slot check failed, keeping booking: {results['check']['error']}")
+            else:
+                # The listing may or may not include the new event itself
+                start_epoch = _to_epoch(start_datetime)
+                end_epoch = _to_epoch(end_datetime)
+                others = [item for item in results['check']['response'].get('items', [])
+                          if item.get('id') != created_event['id']]
+                conflicts = [
+                    busy for busy in self._event_intervals(others)
+                    if (start_epoch < busy['end']) and (end_epoch > busy['start'])
+                ]
+                if conflicts:
+                    try:
+                        self.service.events().delete(calendarId=self.calendar_id,
+                                                     eventId=created_event['id']).execute()
+                        logger.info(f"Slot taken, rolled back event {created_event['id']}")
+                    except Exception as e:
+                        # The slot is still taken; report the conflict, but the extra event needs removing by hand
+                        logger.error(f"Slot taken and rollback failed, double-booked event left in calendar: "
+                                     f"{created_event['id']}: {e}")
+                    try:
+                        day_busy = self._event_intervals(self._get_day_events(start_datetime))
+                        alternatives = self._suggest_alternative_slots(start_datetime, day_busy, 30)
+                    except Exception as e:
+                        logger.warning(f"Failed to list alternatives: {e}")
+                        alternatives = []
+                    return {
+                        'success': False,
+                        'available': False,
+                        'conflicts': [f"{c['summary']} from {_format_epoch_time(c['start'])} to {_format_epoch_time(c['end'])}" for c in conflicts],
+                        'alternatives': alternatives,
+                        'error': f'Time slot not available: {appointment_date} at {appointment_time}'
+                    }
 
-            if not parsed_date:
-                logger.error(f"Could not parse date: {date_str}")
-                return None
+            logger.info(f"Calendar event created successfully. Event ID: {created_event['id']}")
+            logger.info(f"Appointment: {patient_name} with {doctor_name} on {appointment_date} at {appointment_time}")
 
-            parsed_time = None
-            for time_format in time_formats:
-                try:
-                    parsed_time = datetime.strptime(time_str.strip(), time_format).time()
-                    break
-                except ValueError:
+            return {
+                'success': True,
+                'available': True,
+                'event_id': created_event['id'],
+                'event_link': created_event.get('htmlLink', ''),
+                'patient': patient_name,
+                'doctor': doctor_name,
+                'date': appointment_date,
+                'time': appointment_time,
+                'message': f'Appointment added to hospital calendar: {patient_name} with {doctor_name}'
+            }
+
+        except HttpError as error:
+            logger.error(f"Calendar API HTTP error: {error}")
+            return {
+                'success': False,
+                'error': f"Calendar API error: {error}",
+                'error_code': error.resp.status if error.resp else None
+            }
+        except Exception as e:
+            logger.error(f"Failed to book calendar event: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def create_appointments_batch(self, appointments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many appointment events using batched API calls
+
+        Each appointment is a dict with the create_appointment_event arguments.
+        Results are keyed by the appointment's index in the input list.
+        """
+        try:
+            if not self.service:
+                raise Exception("Calendar service not initialized")
+
+            results = {}
+            requests = []
+            touched_days = set()
+            for index, appointment in enumerate(appointments):
+                request_id = str(index)
+                start_datetime = self._parse_appointment_datetime(appointment['appointment_date'],
+                                                                  appointment['appointment_time'])
+                if not start_datetime:
+                    results[request_id] = {
+                        'success': False,
+                        'error': f"Invalid date/time format: {appointment['appointment_date']} {appointment['appointment_time']}"
+                    }
                     continue
 
-            if not parsed_time:
-                logger.error(f"Could not parse time: {time_str}")
-                return None
+                event = self._build_event_body(start_datetime, appointment['patient_name'],
+                                               appointment['patient_email'], appointment.get('patient_phone', 'Not provided'),
+                                               appointment['doctor_name'], appointment['department'])
+                requests.append((request_id, self.service.events().insert(calendarId=self.calendar_id, body=event)))
+                touched_days.add(start_datetime.date())
+
+            batch_results = self._execute_batch(requests)
+            for day in touched_days:
+                self._invalidate_day(datetime.combine(day, datetime.min.time(), _IST))
+
+            for request_id, result in batch_results.items():
+                if result['success']:
+                    created_event = result.pop('response')
+                    appointment = appointments[int(request_id)]
+                    result.update({
+                        'event_id': created_event['id'],
+                        'event_link': created_event.get('htmlLink', ''),
+                        'patient': appointment['patient_name'],
+                        'doctor': appointment['doctor_name'],
+                        'date': appointment['appointment_date'],
+                        'time': appointment['appointment_time'],
+                        'message': f"Appointment added to hospital calendar: {appointment['patient_name']} with {appointment['doctor_name']}"
+                    })
+                results[request_id] = result
+
+            created = sum(1 for result in results.values() if result['success'])
+            logger.info(f"Batch created {created}/{len(appointments)} calendar events")
 
-            # Combine date and time
-            appointment_datetime = datetime.combine(parsed_date, parsed_time)
-            return appointment_datetime
+            return {
+                'success': True,
+                'results': results,
+                'created': created,
+                'failed': len(appointments) - created
+            }
 
         except Exception as e:
-            logger.error(f"Error parsing appointment datetime: {e}")
-            return None
+            logger.error(f"Failed to batch create calendar events: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def cancel_appointments_batch(self, event_ids: List[str]) -> Dict[str, Any]:
+        """Delete many appointment events by ID using batched API calls"""
+        try:
+            if not self.service:
+                raise Exception("Calendar service not initialized")
+
+            requests = [(event_id, self.service.events().delete(calendarId=self.calendar_id, eventId=event_id))
+                        for event_id in dict.fromkeys(event_ids)]
+            results = self._execute_batch(requests)
+            for result in results.values():
+                result.pop('response', None)
+            # Deleted events' days are unknown here, so drop every cached listing
+            self._day_cache.clear()
+
+            cancelled = sum(1 for result in results.values() if result['success'])
+            logger.info(f"Batch cancelled {cancelled}/{len(event_ids)} calendar events")
+
+            return {
+                'success': True,
+                'results': results,
+                'cancelled': cancelled,
+                'failed': len(results) - cancelled
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to batch cancel calendar events: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _parse_appointment_datetime(self, date_str: str, time_str: str) -> Optional[datetime]:
+        """Parse appointment date and time strings into datetime object"""
+        return parse_appointment_datetime(date_str, time_str)
+
+    def _get_day_events(self, moment: datetime) -> list:
+        """Get all events on the day of `moment`, reusing a recent listing if cached"""
+        day_start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        key = (self.calendar_id, day_start.isoformat())
+        now = time.monotonic()
+
+        cached = self._day_cache.get(key)
+        if cached and now - cached[0] < _DAY_CACHE_TTL:
+            return cached[1]
+
+        day_end = day_start + timedelta(days=1)
+        events_result = self.service.events().list(
+            calendarId=self.calendar_id,
+            timeMin=day_start.isoformat(),
+            timeMax=day_end.isoformat(),
+            singleEvents=True,  # Expand recurring events so each occurrence is checked
+            fields=_EVENT_FIELDS
+        ).execute()
+        events = events_result.get('items', [])
+
+        if len(self._day_cache) >= _DAY_CACHE_MAX_ENTRIES:
+            self._day_cache = {k: v for k, v in self._day_cache.items() if now - v[0] < _DAY_CACHE_TTL}
+        self._day_cache[key] = (now, events)
+        return events
+
+    def _invalidate_day(self, moment: datetime):
+        """Drop the cached event listing for the day of `moment`"""
+        day_start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._day_cache.pop((self.calendar_id, day_start.isoformat()), None)
+
+    def _quick_conflict_check(self, start_datetime: datetime, end_datetime: datetime) -> list:
+        """Get events overlapping a single slot, using the day cache when it is warm"""
+        day_start = start_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
+        cached = self._day_cache.get((self.calendar_id, day_start.isoformat()))
+        if cached and time.monotonic() - cached[0] < _DAY_CACHE_TTL:
+            return cached[1]
+
+        # The API returns every event overlapping [timeMin, timeMax)
+        events_result = self.service.events().list(
+            calendarId=self.calendar_id,
+            timeMin=start_datetime.isoformat(),
+            timeMax=end_datetime.isoformat(),
+            singleEvents=True,
+            fields=_EVENT_FIELDS
+        ).execute()
+        return events_result.get('items', [])
+
+    def _event_intervals(self, events: list) -> list:
+        """Convert timed events into {summary, start, end} busy intervals in epoch seconds"""
+        intervals = []
+        for event in events:
+            event_start_str = event.get('start', {}).get('dateTime')  # absent for all-day events
+            event_end_str = event.get('end', {}).get('dateTime')
+
+            if event_start_str and event_end_str:
+                # Parse existing event times
+                try:
+                    intervals.append({
+                        'summary': event.get('summary', 'Busy'),
+                        'start': _to_epoch(_parse_event_datetime(event_start_str)),
+                        'end': _to_epoch(_parse_event_datetime(event_end_str))
+                    })
+                except Exception as e:
+                    logger.warning(f"Failed to parse event time: {e}")
+        return intervals
 
     def check_availability(self, appointment_date: str, appointment_time: str,
                           duration_minutes: int = 30) -> Dict[str, Any]:
@@ -205,46 +591,13 @@ Automatically scheduled via voice agent.
 
             end_datetime = start_datetime + timedelta(minutes=duration_minutes)
 
-            # Check for conflicts in a wider time range (same day)
-            day_start = start_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-
-            # Get events for the entire day
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=day_start.isoformat() + '+05:30',  # India timezone
-                timeMax=day_end.isoformat() + '+05:30',
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-
-            events = events_result.get('items', [])
-
-            # Check for conflicts
-            conflicts = []
-            for event in events:
-                event_start_str = event['start'].get('dateTime')
-                event_end_str = event['end'].get('dateTime')
-
-                if event_start_str and event_end_str:
-                    # Parse existing event times
-                    try:
-                        event_start = datetime.fromisoformat(event_start_str.replace('Z', '+00:00'))
-                        event_end = datetime.fromisoformat(event_end_str.replace('Z', '+00:00'))
-
-                        # Remove timezone info for comparison
-                        event_start = event_start.replace(tzinfo=None)
-                        event_end = event_end.replace(tzinfo=None)
-
-                        # Check for overlap
-                        if (start_datetime < event_end) and (end_datetime > event_start):
-                            conflicts.append({
-                                'summary': event.get('summary', 'Busy'),
-                                'start': event_start,
-                                'end': event_end
-                            })
-                    except Exception as e:
-                        logger.warning(f"Failed to parse event time: {e}")
+            # Check for conflicts in the requested window only
+            start_epoch = _to_epoch(start_datetime)
+            end_epoch = start_epoch + duration_minutes * 60
+            conflicts = [
+                busy for busy in self._event_intervals(self._quick_conflict_check(start_datetime, end_datetime))
+                if (start_epoch < busy['end']) and (end_epoch > busy['start'])
+            ]
 
             # If slot is available
             if not conflicts:
@@ -259,13 +612,14 @@ Automatically scheduled via voice agent.
                     'message': f'Time slot is available: {appointment_date} at {appointment_time}'
                 }
 
-            # If slot is not available, suggest alternatives
-            alternatives = self._suggest_alternative_slots(start_datetime, conflicts, duration_minutes)
+            # If slot is not available, suggest alternatives around the rest of the day's bookings
+            day_busy = self._event_intervals(self._get_day_events(start_datetime))
+            alternatives = self._suggest_alternative_slots(start_datetime, day_busy, duration_minutes)
 
             return {
                 'success': True,
                 'available': False,
-                'conflicts': [f"{c['summary']} from {c['start'].strftime('%I:%M %p')} to {c['end'].strftime('%I:%M %p')}" for c in conflicts],
+                'conflicts': [f"{c['summary']} from {_format_epoch_time(c['start'])} to {_format_epoch_time(c['end'])}" for c in conflicts],
                 'alternatives': alternatives,
                 'message': f'Time slot not available. Found {len(conflicts)} conflicts. Here are some alternatives.'
             }
@@ -280,55 +634,53 @@ Automatically scheduled via voice agent.
     def _suggest_alternative_slots(self, requested_time: datetime, conflicts: list,
                                   duration_minutes: int = 30) -> list:
         """Suggest alternative time slots"""
-        alternatives = []
+        # Limit to 5 alternatives
+        return list(islice(self._iter_alternative_slots(requested_time, conflicts, duration_minutes), 5))
 
+    def _iter_alternative_slots(self, requested_time: datetime, conflicts: list,
+                                duration_minutes: int = 30):
+        """Yield free slots in date order, one day at a time"""
         # Define working hours (9 AM to 6 PM)
         working_start = 9
         working_end = 18
+        day_slots = working_start * 3600 + np.arange((working_end - working_start) * 2) * 1800
 
-        # Start from the requested date
-        current_date = requested_time.date()
+        # Start from the requested date; slot times are seconds from its midnight
+        base = requested_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        base_epoch = _to_epoch(base)
+        requested_offset = int((requested_time - base).total_seconds())
 
-        # Check next 7 days
-        for day_offset in range(7):
-            check_date = current_date + timedelta(days=day_offset)
+        # Bucket conflicts by every day they touch so each day only tests its own
+        conflicts_by_day = {}
+        for conflict in conflicts:
+            start, end = conflict['start'] - base_epoch, conflict['end'] - base_epoch
+            for day in range(max(start // 86400, 0), min((end - 1) // 86400, 6) + 1):
+                conflicts_by_day.setdefault(day, []).append((start, end))
 
+        # Check next 7 days
+        for day in range(7):
             # Skip weekends (optional - remove if hospital works on weekends)
-            if check_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
+            if (requested_time.weekday() + day) % 7 >= 5:
                 continue
 
-            # Generate time slots for the day
-            for hour in range(working_start, working_end):
-                for minute in [0, 30]:  # 30-minute slots
-                    slot_start = datetime.combine(check_date, datetime.min.time().replace(hour=hour, minute=minute))
-                    slot_end = slot_start + timedelta(minutes=duration_minutes)
-
-                    # Skip if this is the same as requested time (already checked)
-                    if slot_start == requested_time:
-                        continue
-
-                    # Check if this slot conflicts with existing appointments
-                    slot_available = True
-
-                    # Quick check against known conflicts for same day
-                    if check_date == requested_time.date():
-                        for conflict in conflicts:
-                            if (slot_start < conflict['end']) and (slot_end > conflict['start']):
-                                slot_available = False
-                                break
-
-                    if slot_available:
-                        alternatives.append({
-                            'date': check_date.strftime('%Y-%m-%d'),
-                            'time': slot_start.strftime('%I:%M %p'),
-                            'formatted': f"{check_date.strftime('%B %d, %Y')} at {slot_start.strftime('%I:%M %p')}"
-                        })
-
-                        # Limit to 5 alternatives
-                        if len(alternatives) >= 5:
-                            return alternatives
-
-        return alternatives
+            slot_starts = day_slots + day * 86400
+            # Skip the requested time itself (already checked)
+            open_slots = slot_starts != requested_offset
+
+            day_conflicts = conflicts_by_day.get(day)
+            if day_conflicts:
+                conflict_starts, conflict_ends = np.array(day_conflicts).T
+                slot_ends = slot_starts + duration_minutes * 60
+                open_slots &= ~((slot_starts[:, None] < conflict_ends)
+                                & (slot_ends[:, None] > conflict_starts)).any(axis=1)
+
+            for offset in slot_starts[open_slots]:
+                slot_start = base + timedelta(seconds=int(offset))
+                yield {
+                    'date': slot_start.strftime('%Y-%m-%d'),
+                    'time': slot_start.strftime('%I:%M %p'),
+                    'formatted': f"{slot_start.strftime('%B %d, %Y')} at {slot_start.strftime('%I:%M %p')}"
+                }
 
     def list_upcoming_appointments(self, days_ahead: int = 7) -> Dict[str, Any]:
         """List upcoming appointments in the next N days"""
@@ -348,7 +700,8 @@ Automatically scheduled via voice agent.
                 timeMax=time_max,
                 maxResults=50,
                 singleEvents=True,
-                orderBy='startTime'
+                orderBy='startTime',
+                fields=_UPCOMING_FIELDS
             ).execute()
 
             events = events_result.get('items', [])
@@ -393,40 +746,31 @@ Automatically scheduled via voice agent.
                 }
 
             # Search for the appointment
-            day_start = start_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=day_start.isoformat() + '+05:30',
-                timeMax=day_end.isoformat() + '+05:30',
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-
-            events = events_result.get('items', [])
+            events = self._get_day_events(start_datetime)
 
             # Find matching appointment
+            start_epoch = _to_epoch(start_datetime)
+            name_key = patient_name.casefold()
+            doctor_key = doctor_name.casefold()
             matching_event = None
             for event in events:
-                event_start_str = event['start'].get('dateTime')
-                description = event.get('description', '').lower()
-                summary = event.get('summary', '').lower()
+                event_start_str = event.get('start', {}).get('dateTime')
 
                 if event_start_str:
                     try:
-                        event_start = datetime.fromisoformat(event_start_str.replace('Z', '+00:00')).replace(tzinfo=None)
+                        event_start = _to_epoch(_parse_event_datetime(event_start_str))
 
                         # Check if time matches (within 15 minutes tolerance)
-                        time_diff = abs((event_start - start_datetime).total_seconds())
+                        if abs(event_start - start_epoch) > 900:
+                            continue
 
-                        # Verify patient details
-                        name_match = patient_name.lower() in description or patient_name.lower() in summary
-                        email_match = patient_email.lower() in description if patient_email else True
-                        phone_match = patient_phone in description if patient_phone else True
-                        doctor_match = doctor_name.lower() in description or doctor_name.lower() in summary
+                        # Verify patient and doctor details
+                        description = event.get('description', '').casefold()
+                        summary = event.get('summary', '').casefold()
+                        name_match = name_key in description or name_key in summary
+                        doctor_match = doctor_key in description or doctor_key in summary
 
-                        if time_diff <= 900 and name_match and doctor_match:  # 15 minutes tolerance
+                        if name_match and doctor_match:
                             matching_event = event
                             break
 
@@ -450,6 +794,7 @@ Automatically scheduled via voice agent.
                 calendarId=self.calendar_id,
                 eventId=matching_event['id']
             ).execute()
+            self._invalidate_day(start_datetime)
 
             logger.info(f"Appointment cancelled: {patient_name} with {doctor_name} on {appointment_date}")
 
@@ -479,20 +824,24 @@ Automatically scheduled via voice agent.
                 'error': str(e)
             }
 
-    def get_calendar_info(self) -> Dict[str, Any]:
-        """Get calendar information"""
+    def get_calendar_info(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get calendar information (cached after the first successful fetch)"""
         try:
+            if self._calendar_info and not refresh:
+                return dict(self._calendar_info)
+
             if not self.service:
                 raise Exception("Calendar service not initialized")
 
             calendar = self.service.calendars().get(calendarId=self.calendar_id).execute()
-            return {
+            self._calendar_info = {
                 'success': True,
                 'calendar_name': calendar.get('summary', 'Primary Calendar'),
                 'calendar_id': calendar.get('id', ''),
                 'timezone': calendar.get('timeZone', ''),
                 'description': calendar.get('description', '')
             }
+            return dict(self._calendar_info)
 
         except Exception as e:
             logger.error(f"Failed to get calendar info: {str(e)}")
@@ -503,12 +852,15 @@ Automatically scheduled via voice agent.
 
 # Global Calendar service instance
 _calendar_service = None
+_calendar_service_lock = threading.Lock()
 
 def get_calendar_service() -> CalendarService:
     """Get a singleton Calendar service instance"""
     global _calendar_service
     if _calendar_service is None:
-        _calendar_service = CalendarService()
+        with _calendar_service_lock:
+            if _calendar_service is None:
+                _calendar_service = CalendarService()
     return _calendar_service
 
 def create_appointment_quick(patient_name: str, patient_email: str,
@@ -1,17 +1,40 @@
 #!/usr/bin/env python3
 
 import os
+import io
+import asyncio
 import csv
+import mmap
+import atexit
+import sqlite3
 import logging
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
-import uuid
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# CSV schema; the COL_* indices below follow this order
+CSV_HEADER = (
+    'call_id', 'timestamp', 'caller_phone', 'duration_seconds',
+    'customer_type', 'customer_name', 'customer_email',
+    'call_type', 'department_enquired', 'doctor_enquired',
+    'appointment_date', 'appointment_time', 'language_used',
+    'call_summary', 'resolution_status', 'agent_notes',
+    'session_id', 'hangup_reason'
+)
+(COL_CALL_ID, COL_TIMESTAMP, COL_CALLER_PHONE, COL_DURATION_SECONDS,
+ COL_CUSTOMER_TYPE, COL_CUSTOMER_NAME, COL_CUSTOMER_EMAIL,
+ COL_CALL_TYPE, COL_DEPARTMENT_ENQUIRED, COL_DOCTOR_ENQUIRED,
+ COL_APPOINTMENT_DATE, COL_APPOINTMENT_TIME, COL_LANGUAGE_USED,
+ COL_CALL_SUMMARY, COL_RESOLUTION_STATUS, COL_AGENT_NOTES,
+ COL_SESSION_ID, COL_HANGUP_REASON) = range(len(CSV_HEADER))
+
 class CallType(Enum):
     """Types of calls"""
     APPOINTMENT_BOOKING = "appointment_booking"
@@ -59,6 +82,26 @@ class CallRecord:
     session_id: Optional[str] = None
     hangup_reason: Optional[str] = None
 
+# Values written for fields missing from call_data; other fields are left empty
+CALL_DEFAULTS = {
+    'caller_phone': 'unknown',
+    'customer_type': CustomerType.UNKNOWN.value,
+    'call_type': CallType.OTHER.value,
+    'language_used': 'english',
+    'resolution_status': CallStatus.UNRESOLVED.value
+}
+# The same defaults laid out in CSV_HEADER order
+_DEFAULT_ROW = tuple(zip(CSV_HEADER, (CALL_DEFAULTS.get(field) for field in CSV_HEADER)))
+
+# log_call rows are written once this many are pending, or after this many seconds
+_LOG_BATCH_ROWS = 32
+_LOG_BATCH_WINDOW = 0.005
+
+# log_call_async writes a batch once this many calls are queued, or this many
+# seconds after the first one arrived
+_LOG_QUEUE_BATCH = 50
+_LOG_QUEUE_WINDOW = 1.0
+
 class CallLogger:
     """Handles logging of call information to CSV"""
 
@@ -67,7 +110,40 @@ class CallLogger:
         self.csv_file_path = csv_file_path or os.path.join(
             os.path.dirname(__file__), '..', 'call_logs.csv'
         )
+        self._lock = threading.Lock()
+        self._queue = None  # asyncio.Queue of rows for log_call_async
+        self._drain_task = None
+        self._pending = []  # log_call rows waiting for the flusher thread
+        self._pending_event = threading.Event()
+        self._flusher = None  # thread started by the first deferred write
         self.ensure_csv_exists()
+        self._build_offset_index()
+
+        # Long-lived O_APPEND descriptor; each batch goes out in a single write(),
+        # so appends from several worker processes don't interleave (binary: no \r\n translation on Windows)
+        self._fd = os.open(self.csv_file_path,
+                           os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        self._row_buffer = io.StringIO()
+        self._row_writer = csv.writer(self._row_buffer)
+        # Read handle reused by get_recent_calls
+        self._read_file = open(self.csv_file_path, 'rb')
+        atexit.register(self.close)
+
+    def flush(self):
+        """Write any pending call records through to the CSV file"""
+        with self._lock:
+            if self._fd is not None:
+                self._write_pending()
+
+    def close(self):
+        """Flush and close the file handles"""
+        with self._lock:
+            if self._fd is not None:
+                self._write_pending()
+                os.close(self._fd)
+                self._fd = None
+                self._read_file.close()
+                self._pending_event.set()  # let the flusher thread see the closed file and exit
 
     def ensure_csv_exists(self):
         """Ensure the CSV file exists with proper headers"""
@@ -78,172 +154,341 @@ class CallLogger:
                 # Create CSV with headers
                 with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.writer(file)
-                    writer.writerow([
-                        'call_id', 'timestamp', 'caller_phone', 'duration_seconds',
-                        'customer_type', 'customer_name', 'customer_email',
-                        'call_type', 'department_enquired', 'doctor_enquired',
-                        'appointment_date', 'appointment_time', 'language_used',
-                        'call_summary', 'resolution_status', 'agent_notes',
-                        'session_id', 'hangup_reason'
-                    ])
+                    writer.writerow(CSV_HEADER)
                 logger.info(f"Created new call log CSV: {self.csv_file_path}")
 
             except Exception as e:
                 logger.error(f"Failed to create CSV file: {e}")
                 raise
 
+    def _build_offset_index(self):
+        """Map each call_id to the byte offset of its record, for update_call"""
+        self._offset_index: Dict[str, int] = {}
+        with open(self.csv_file_path, 'rb') as file:
+            file.readline()  # header
+            offset = file.tell()
+            quotes = 0  # odd while inside a quoted field spanning lines
+            for line in iter(file.readline, b''):
+                if quotes % 2 == 0:
+                    call_id = line.split(b',', 1)[0]
+                    if call_id.startswith(b'"'):
+                        call_id = next(csv.reader([line.decode('utf-8')]))[0].encode('utf-8')
+                    self._offset_index.setdefault(call_id.decode('utf-8').rstrip('\r\n'), offset)
+                quotes += line.count(b'"')
+                offset += len(line)
+
+    def _build_row(self, call_data: Dict[str, Any]) -> list:
+        """Build a CSV_HEADER-ordered row from call data, filling defaults"""
+        get = call_data.get
+        row = [get(field, default) for field, default in _DEFAULT_ROW]
+        # Generate unique call ID
+        row[COL_CALL_ID] = call_data.get('call_id') or os.urandom(4).hex()
+        if 'timestamp' not in call_data:
+            row[COL_TIMESTAMP] = datetime.now().isoformat()
+        return row
+
+    def _write_rows(self, rows: list):
+        """Append rows to the CSV now, together with any deferred ones"""
+        with self._lock:
+            self._pending.extend(rows)
+            self._write_pending()
+
+    def _defer_rows(self, rows: list):
+        """Queue rows for the flusher thread (flushed before reads and on exit)"""
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= _LOG_BATCH_ROWS:
+                self._write_pending()
+                return
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_pending_loop, name="call-log-flush", daemon=True)
+                self._flusher.start()
+        self._pending_event.set()
+
+    def _flush_pending_loop(self):
+        """Flusher thread: write deferred rows _LOG_BATCH_WINDOW after they arrive"""
+        try:
+            while True:
+                self._pending_event.wait()
+                time.sleep(_LOG_BATCH_WINDOW)
+                self._pending_event.clear()  # rows deferred from here on set it again
+                with self._lock:
+                    if self._fd is None:
+                        return
+                    try:
+                        self._write_pending()
+                    except Exception as e:
+                        # Rows stay pending and are retried on the next write
+                        logger.error(f"Failed to write queued calls: {e}")
+        finally:
+            with self._lock:
+                self._flusher = None  # _defer_rows starts a new thread if this one exits
+
+    def _write_pending(self):
+        """Append pending rows to the CSV in one write (caller holds the lock)"""
+        if not self._pending:
+            return
+
+        # Serialize row by row so each record's offset can be indexed
+        lines = []
+        for row in self._pending:
+            self._row_buffer.seek(0)
+            self._row_buffer.truncate()
+            self._row_writer.writerow(row)
+            lines.append(self._row_buffer.getvalue().encode('utf-8'))
+        data = b''.join(lines)
+        os.write(self._fd, data)
+
+        # After an O_APPEND write the descriptor sits at the end of our data,
+        # wherever other writers put theirs
+        offset = os.lseek(self._fd, 0, os.SEEK_CUR) - len(data)
+        for row, line in zip(self._pending, lines):
+            self._offset_index.setdefault(str(row[COL_CALL_ID]), offset)
+            offset += len(line)
+        self._pending = []
+
     def log_call(self, call_data: Dict[str, Any]) -> str:
         """Log a call to the CSV file"""
         try:
-            # Generate unique call ID
-            call_id = call_data.get('call_id', str(uuid.uuid4())[:8])
-
-            # Create call record
-            record = CallRecord(
-                call_id=call_id,
-                timestamp=call_data.get('timestamp', datetime.now().isoformat()),
-                caller_phone=call_data.get('caller_phone', 'unknown'),
-                duration_seconds=call_data.get('duration_seconds'),
-                customer_type=call_data.get('customer_type', CustomerType.UNKNOWN.value),
-                customer_name=call_data.get('customer_name', ''),
-                customer_email=call_data.get('customer_email', ''),
-                call_type=call_data.get('call_type', CallType.OTHER.value),
-                department_enquired=call_data.get('department_enquired', ''),
-                doctor_enquired=call_data.get('doctor_enquired', ''),
-                appointment_date=call_data.get('appointment_date'),
-                appointment_time=call_data.get('appointment_time'),
-                language_used=call_data.get('language_used', 'english'),
-                call_summary=call_data.get('call_summary', ''),
-                resolution_status=call_data.get('resolution_status', CallStatus.UNRESOLVED.value),
-                agent_notes=call_data.get('agent_notes', ''),
-                session_id=call_data.get('session_id'),
-                hangup_reason=call_data.get('hangup_reason')
-            )
+            row = self._build_row(call_data)
+            self._defer_rows([row])
 
-            # Write to CSV
-            with open(self.csv_file_path, 'a', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow([
-                    record.call_id, record.timestamp, record.caller_phone, record.duration_seconds,
-                    record.customer_type, record.customer_name, record.customer_email,
-                    record.call_type, record.department_enquired, record.doctor_enquired,
-                    record.appointment_date, record.appointment_time, record.language_used,
-                    record.call_summary, record.resolution_status, record.agent_notes,
-                    record.session_id, record.hangup_reason
-                ])
-
-            logger.info(f"Call logged successfully: {call_id}")
-            return call_id
+            logger.info(f"Call queued for logging: {row[COL_CALL_ID]}")
+            return row[COL_CALL_ID]
 
         except Exception as e:
             logger.error(f"Failed to log call: {e}")
             raise
 
-    def update_call(self, call_id: str, updates: Dict[str, Any]) -> bool:
-        """Update an existing call record"""
+    def log_calls_batch(self, calls: List[Dict[str, Any]]) -> List[str]:
+        """Log several calls in one write; returns their call IDs"""
         try:
-            # Read all records
-            records = []
-            updated = False
+            rows = [self._build_row(call_data) for call_data in calls]
+            self._write_rows(rows)
 
-            with open(self.csv_file_path, 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                records = list(reader)
-
-            # Update the matching record
-            for record in records:
-                if record['call_id'] == call_id:
-                    for key, value in updates.items():
-                        if key in record:
-                            record[key] = str(value) if value is not None else ''
-                    updated = True
-                    break
+            logger.info(f"Logged {len(rows)} calls")
+            return [row[COL_CALL_ID] for row in rows]
 
-            if not updated:
-                logger.warning(f"Call ID not found for update: {call_id}")
-                return False
+        except Exception as e:
+            logger.error(f"Failed to log calls: {e}")
+            raise
 
-            # Write back to CSV
-            with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as file:
-                if records:
-                    writer = csv.DictWriter(file, fieldnames=records[0].keys())
-                    writer.writeheader()
-                    writer.writerows(records)
+    async def log_call_async(self, call_data: Dict[str, Any]) -> str:
+        """Queue a call for logging without blocking the event loop
+
+        Returns the call ID immediately; a background task writes queued
+        calls in batches on the default executor.
+        """
+        row = self._build_row(call_data)
+        loop = asyncio.get_running_loop()
+        if self._drain_task is None or self._drain_task.done() or self._drain_task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._drain_task = loop.create_task(self._drain_queue())
+        self._queue.put_nowait(row)
+        return row[COL_CALL_ID]
+
+    async def _drain_queue(self):
+        """Write queued calls in batches of up to _LOG_QUEUE_BATCH, at most _LOG_QUEUE_WINDOW apart"""
+        loop = asyncio.get_running_loop()
+        rows = []
+        try:
+            while True:
+                flushed = None  # flush_async marker ending this batch early
+                item = await self._queue.get()
+                deadline = loop.time() + _LOG_QUEUE_WINDOW
+                while True:
+                    if isinstance(item, asyncio.Future):
+                        flushed = item
+                        break
+                    rows.append(item)
+                    if len(rows) >= _LOG_QUEUE_BATCH:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+
+                batch, rows = rows, []
+                if batch:
+                    try:
+                        await loop.run_in_executor(None, self._write_rows, batch)
+                        logger.info(f"Logged {len(batch)} queued calls")
+                    except Exception as e:
+                        logger.error(f"Failed to log queued calls: {e}")
+                if flushed is not None and not flushed.done():
+                    flushed.set_result(None)
+        finally:
+            # Cancelled while collecting a batch (event loop shutting down)
+            if rows:
+                self._write_rows(rows)
+
+    async def flush_async(self):
+        """Write any calls still waiting in the async queue"""
+        task = self._drain_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return
+        flushed = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(flushed)
+        await flushed
 
-            logger.info(f"Call updated successfully: {call_id}")
-            return True
+    def update_call(self, call_id: str, updates: Dict[str, Any]) -> bool:
+        """Update an existing call record"""
+        try:
+            with self._lock:
+                self._write_pending()
+                return self._rewrite_with_update(call_id, updates)
 
         except Exception as e:
             logger.error(f"Failed to update call: {e}")
             return False
 
+    def _rewrite_with_update(self, call_id: str, updates: Dict[str, Any]) -> bool:
+        """Update one record in place (caller holds the lock)
+
+        The record is located through the offset index (falling back to an
+        mmap byte search if the hint is stale), then only the bytes from that
+        record to the end of the file are rewritten.
+        """
+        # On-disk form of the ID at the start of a record
+        id_field = io.StringIO()
+        csv.writer(id_field).writerow([call_id, ''])
+        needle = b'\n' + id_field.getvalue().rstrip('\r\n').encode('utf-8')
+
+        with open(self.csv_file_path, 'r+b') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                logger.warning(f"Call ID not found for update: {call_id}")
+                return False
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header_end = mm.find(b'\n') + 1
+                header = next(csv.reader([mm[:header_end].decode('utf-8')]))
+                offset = self._offset_index.get(call_id)
+                if offset is None or mm[offset - 1:offset - 1 + len(needle)] != needle:
+                    offset = self._find_record(mm, needle, header_end)
+                    if offset is None:
+                        logger.warning(f"Call ID not found for update: {call_id}")
+                        return False
+                tail = mm[offset:].decode('utf-8')
+
+            # Parse just the matching record; the rest of the tail is kept verbatim
+            tail_buffer = io.StringIO(tail, newline='')
+            record = next(csv.reader(tail_buffer))
+            rest = tail[tail_buffer.tell():]
+
+            record += [''] * (len(header) - len(record))
+            for key, value in updates.items():
+                if key in header:
+                    record[header.index(key)] = str(value) if value is not None else ''
+
+            row_buffer = io.StringIO()
+            csv.writer(row_buffer).writerow(record)
+
+            # Write back from the record onwards
+            new_tail = (row_buffer.getvalue() + rest).encode('utf-8')
+            file.seek(offset)
+            file.write(new_tail)
+            file.truncate()
+
+        # Records after this one moved by the change in its length
+        shift = offset + len(new_tail) - size
+        if shift:
+            for key, position in self._offset_index.items():
+                if position > offset:
+                    self._offset_index[key] = position + shift
+
+        logger.info(f"Call updated successfully: {call_id}")
+        return True
+
+    @staticmethod
+    def _find_record(mm, needle: bytes, header_end: int) -> Optional[int]:
+        """Byte offset of the record that `needle` (newline + ID field) starts
+
+        A match inside a quoted multi-line field is skipped: the line it
+        starts on is a record boundary only when an even number of quotes
+        precede it (escaped quotes come in pairs).
+        """
+        position = header_end
+        quotes = 0
+        hit = mm.find(needle, header_end - 1)
+        while hit != -1:
+            quotes += mm[position:hit + 1].count(b'"')
+            position = hit + 1
+            if quotes % 2 == 0:
+                return hit + 1
+            hit = mm.find(needle, hit + 1)
+        return None
+
     def get_call_stats(self, days: int = 30) -> Dict[str, Any]:
         """Get call statistics for the last N days"""
         try:
             # Calculate cutoff date
             cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
 
-            stats = {
-                'total_calls': 0,
-                'by_type': {},
-                'by_language': {},
-                'by_resolution': {},
-                'by_customer_type': {},
-                'average_duration': 0,
-                'departments_contacted': {},
-                'doctors_contacted': {}
-            }
-
-            durations = []
-
-            with open(self.csv_file_path, 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-
-                for record in reader:
-                    # Filter by date
-                    if record['timestamp'] < cutoff_date:
+            call_types = []
+            languages = []
+            resolutions = []
+            customer_types = []
+            departments = []
+            doctors = []
+            duration_total = 0
+            duration_count = 0
+
+            # Filter by date on the raw bytes (UTF-8 sorts like str) and only
+            # decode and parse the records that pass
+            cutoff = cutoff_date.encode('utf-8')
+            recent = []
+            quotes = 0  # odd while inside a quoted field spanning lines
+            keep = False
+
+            self.flush()
+            with open(self.csv_file_path, 'rb') as file:
+                file.readline()  # Header
+                for line in file:
+                    if quotes % 2 == 0:
+                        fields = line.split(b',', COL_TIMESTAMP + 1)
+                        keep = len(fields) > COL_TIMESTAMP + 1 and fields[COL_TIMESTAMP] >= cutoff
+                    if keep:
+                        recent.append(line)
+                    quotes += line.count(b'"')
+
+            if recent:
+                reader = csv.reader(io.StringIO(b''.join(recent).decode('utf-8'), newline=''))
+                for row in reader:
+                    # Skip truncated rows
+                    if len(row) < len(CSV_HEADER):
                         continue
 
-                    stats['total_calls'] += 1
+                    call_types.append(row[COL_CALL_TYPE])
+                    languages.append(row[COL_LANGUAGE_USED])
+                    resolutions.append(row[COL_RESOLUTION_STATUS])
+                    customer_types.append(row[COL_CUSTOMER_TYPE])
 
-                    # Count by type
-                    call_type = record['call_type']
-                    stats['by_type'][call_type] = stats['by_type'].get(call_type, 0) + 1
+                    # Track departments and doctors
+                    if row[COL_DEPARTMENT_ENQUIRED]:
+                        departments.append(row[COL_DEPARTMENT_ENQUIRED])
+                    if row[COL_DOCTOR_ENQUIRED]:
+                        doctors.append(row[COL_DOCTOR_ENQUIRED])
 
-                    # Count by language
-                    language = record['language_used']
-                    stats['by_language'][language] = stats['by_language'].get(language, 0) + 1
-
-                    # Count by resolution
-                    resolution = record['resolution_status']
-                    stats['by_resolution'][resolution] = stats['by_resolution'].get(resolution, 0) + 1
-
-                    # Count by customer type
-                    customer_type = record['customer_type']
-                    stats['by_customer_type'][customer_type] = stats['by_customer_type'].get(customer_type, 0) + 1
-
-                    # Track departments
-                    if record['department_enquired']:
-                        dept = record['department_enquired']
-                        stats['departments_contacted'][dept] = stats['departments_contacted'].get(dept, 0) + 1
-
-                    # Track doctors
-                    if record['doctor_enquired']:
-                        doctor = record['doctor_enquired']
-                        stats['doctors_contacted'][doctor] = stats['doctors_contacted'].get(doctor, 0) + 1
-
-                    # Collect durations
-                    if record['duration_seconds']:
+                    # Running duration total for the average
+                    if row[COL_DURATION_SECONDS]:
                         try:
-                            durations.append(int(record['duration_seconds']))
+                            duration_total += int(row[COL_DURATION_SECONDS])
+                            duration_count += 1
                         except ValueError:
                             pass
 
-            # Calculate average duration
-            if durations:
-                stats['average_duration'] = sum(durations) / len(durations)
-
-            return stats
+            # Count everything in one C-level pass per column
+            return {
+                'total_calls': len(call_types),
+                'by_type': dict(Counter(call_types)),
+                'by_language': dict(Counter(languages)),
+                'by_resolution': dict(Counter(resolutions)),
+                'by_customer_type': dict(Counter(customer_types)),
+                'average_duration': duration_total / duration_count if duration_count else 0,
+                'departments_contacted': dict(Counter(departments)),
+                'doctors_contacted': dict(Counter(doctors))
+            }
 
         except Exception as e:
             logger.error(f"Failed to get call stats: {e}")
@@ -254,25 +499,29 @@ class CallLogger:
         try:
             matching_calls = []
 
+            self.flush()
             with open(self.csv_file_path, 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-
-                for record in reader:
-                    match = True
+                reader = csv.reader(file)
+                header = next(reader, None)
+                if not header:
+                    return []
+
+                # Compile criteria into per-column predicates once; unknown keys are ignored
+                predicates = []
+                for key, value in criteria.items():
+                    if key not in header:
+                        continue
+                    if isinstance(value, str):
+                        predicates.append(lambda row, c=header.index(key), n=value.lower(): n in row[c].lower())
+                    else:
+                        predicates.append(lambda row, c=header.index(key), n=str(value): row[c] == n)
 
-                    for key, value in criteria.items():
-                        if key in record:
-                            if isinstance(value, str):
-                                if value.lower() not in record[key].lower():
-                                    match = False
-                                    break
-                            else:
-                                if str(value) != record[key]:
-                                    match = False
-                                    break
+                for row in reader:
+                    if len(row) < len(header):
+                        row += [''] * (len(header) - len(row))
 
-                    if match:
-                        matching_calls.append(record)
+                    if all(predicate(row) for predicate in predicates):
+                        matching_calls.append(dict(zip(header, row)))
 
             return matching_calls
 
@@ -283,14 +532,24 @@ class CallLogger:
     def get_recent_calls(self, limit: int = 50) -> list:
         """Get recent call logs from CSV"""
         try:
-            if not os.path.exists(self.csv_file_path):
-                return []
-
-            calls = []
-            with open(self.csv_file_path, 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    calls.append(row)
+            # Hold the lock so no append lands mid-read
+            with self._lock:
+                self._write_pending()
+                file = self._read_file
+                file.seek(0)
+                header = next(csv.reader([file.readline().decode('utf-8')]), None)
+                if not header:
+                    return []
+
+                calls = self._read_tail_rows(file, len(header), limit) if limit > 0 else None
+                if calls is None:
+                    # Whole file is needed (or the tail couldn't be isolated)
+                    file.seek(0)
+                    reader = csv.reader(io.StringIO(file.read().decode('utf-8'), newline=''))
+                    next(reader)
+                    calls = list(reader)
+
+            calls = [dict(zip(header, row)) for row in calls]
 
             # Return most recent calls (reverse order)
             return calls[-limit:] if len(calls) > limit else calls
@@ -299,14 +558,234 @@ class CallLogger:
             logger.error(f"Failed to read recent calls: {str(e)}")
             return []
 
+    def _read_tail_rows(self, file, columns: int, limit: int) -> Optional[list]:
+        """Parse the last `limit` rows by reading backwards from the end of the file
+
+        Starts with ~512 bytes per row and doubles the window until enough
+        complete rows are found. The first row of a window may begin inside
+        a multi-line field, so it is discarded and parsing stops at any row
+        with the wrong column count. Returns None once the window reaches
+        the header.
+        """
+        size = file.seek(0, os.SEEK_END)
+        window = limit * 512
+        while window < size:
+            file.seek(size - window)
+            data = file.read()
+            boundary = data.find(b'\n') + 1
+            rows = list(csv.reader(io.StringIO(data[boundary:].decode('utf-8'), newline='')))
+
+            tail = []
+            for row in reversed(rows[1:]):
+                if len(row) != columns:
+                    break
+                tail.append(row)
+                if len(tail) == limit:
+                    return tail[::-1]
+
+            window *= 2
+        return None
+
+# get_call_stats buckets for the SQLite backend: (stats key, column, extra filter)
+_STATS_GROUPS = (
+    ('by_type', 'call_type', ''),
+    ('by_language', 'language_used', ''),
+    ('by_resolution', 'resolution_status', ''),
+    ('by_customer_type', 'customer_type', ''),
+    ('departments_contacted', 'department_enquired', " AND department_enquired != ''"),
+    ('doctors_contacted', 'doctor_enquired', " AND doctor_enquired != ''"),
+)
+_STATS_GROUPS_SQL = ' UNION ALL '.join(
+    f"SELECT '{stat}', {column}, COUNT(*) FROM calls WHERE timestamp >= ?{condition} GROUP BY {column}"
+    for stat, column, condition in _STATS_GROUPS
+)
+
+def _int_or_none(value):
+    """int() for SQL aggregates; unparseable durations count as missing, as in the CSV backend"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class SQLiteCallLogger(CallLogger):
+    """Stores call logs in a SQLite database (WAL mode) instead of CSV
+
+    Values are stored as text exactly as the CSV logger writes them, so
+    search and recent-call results match the CSV backend.
+    """
+
+    def __init__(self, db_path: str = None):
+        """Initialize the SQLite call logger"""
+        self.db_path = db_path or os.path.join(
+            os.path.dirname(__file__), '..', 'call_logs.db'
+        )
+        self._lock = threading.Lock()
+        self._queue = None  # asyncio.Queue of rows for log_call_async
+        self._drain_task = None
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        # Python's lower() so case-insensitive search matches the CSV backend beyond ASCII
+        self._conn.create_function('py_lower', 1, str.lower, deterministic=True)
+        self._conn.create_function('py_int', 1, _int_or_none, deterministic=True)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS calls ({', '.join(f'{field} TEXT' for field in CSV_HEADER)})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_call_id ON calls (call_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_timestamp ON calls (timestamp)")
+        logger.info(f"Using SQLite call log: {self.db_path}")
+        atexit.register(self.close)
+
+    def flush(self):
+        """Nothing is buffered; every insert is committed immediately"""
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _write_rows(self, rows: list):
+        """Insert rows in one transaction, stored as text the way the CSV backend writes them"""
+        with self._lock, self._conn:
+            # The connection autocommits; an explicit transaction makes the batch one commit
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"INSERT INTO calls VALUES ({', '.join('?' * len(CSV_HEADER))})",
+                [['' if value is None else str(value) for value in row] for row in rows]
+            )
+
+    def _defer_rows(self, rows: list):
+        """Inserts are committed straight away; nothing is deferred"""
+        self._write_rows(rows)
+
+    def update_call(self, call_id: str, updates: Dict[str, Any]) -> bool:
+        """Update an existing call record"""
+        try:
+            fields = [key for key in updates if key in CSV_HEADER]
+            if not fields:
+                # Nothing to change, but still report whether the call exists
+                with self._lock:
+                    found = self._conn.execute("SELECT 1 FROM calls WHERE call_id = ?", (call_id,)).fetchone()
+            else:
+                with self._lock:
+                    cursor = self._conn.execute(
+                        f"UPDATE calls SET {', '.join(f'{field} = ?' for field in fields)} "
+                        "WHERE rowid = (SELECT rowid FROM calls WHERE call_id = ? ORDER BY rowid LIMIT 1)",
+                        ['' if updates[field] is None else str(updates[field]) for field in fields] + [call_id]
+                    )
+                found = cursor.rowcount > 0
+
+            if not found:
+                logger.warning(f"Call ID not found for update: {call_id}")
+                return False
+
+            logger.info(f"Call updated successfully: {call_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to update call: {e}")
+            return False
+
+    def get_call_stats(self, days: int = 30) -> Dict[str, Any]:
+        """Get call statistics for the last N days"""
+        try:
+            # Calculate cutoff date
+            cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+
+            with self._lock:
+                total_calls, average_duration = self._conn.execute(
+                    "SELECT COUNT(*), AVG(py_int(duration_seconds)) FROM calls WHERE timestamp >= ?",
+                    (cutoff_date,)
+                ).fetchone()
+                groups = self._conn.execute(_STATS_GROUPS_SQL, (cutoff_date,) * len(_STATS_GROUPS)).fetchall()
+
+            stats = {
+                'total_calls': total_calls,
+                'by_type': {},
+                'by_language': {},
+                'by_resolution': {},
+                'by_customer_type': {},
+                'average_duration': average_duration or 0,
+                'departments_contacted': {},
+                'doctors_contacted': {}
+            }
+            for stat, value, count in groups:
+                stats[stat][value] = count
+
+            return stats
+
+        except Exception as e:
+            logger.error(f"Failed to get call stats: {e}")
+            return {}
+
+    def search_calls(self, **criteria) -> list:
+        """Search calls by various criteria"""
+        try:
+            clauses = []
+            params = []
+            for key, value in criteria.items():
+                if key not in CSV_HEADER:
+                    continue
+                if isinstance(value, str):
+                    # Case-insensitive substring match, like the CSV backend
+                    clauses.append(f"instr(py_lower({key}), ?) > 0")
+                    params.append(value.lower())
+                else:
+                    clauses.append(f"{key} = ?")
+                    params.append(str(value))
+
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+            with self._lock:
+                rows = self._conn.execute(f"SELECT * FROM calls{where} ORDER BY rowid", params).fetchall()
+
+            return [dict(zip(CSV_HEADER, row)) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to search calls: {e}")
+            return []
+
+    def get_recent_calls(self, limit: int = 50) -> list:
+        """Get recent call logs from the database"""
+        try:
+            with self._lock:
+                if limit > 0:
+                    rows = self._conn.execute(
+                        "SELECT * FROM calls ORDER BY rowid DESC LIMIT ?", (limit,)
+                    ).fetchall()[::-1]
+                else:
+                    rows = self._conn.execute("SELECT * FROM calls ORDER BY rowid").fetchall()
+
+            return [dict(zip(CSV_HEADER, row)) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to read recent calls: {str(e)}")
+            return []
+
+    def export_csv(self, csv_file_path: str) -> int:
+        """Write every call to a CSV file in the CSV backend's format"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM calls ORDER BY rowid").fetchall()
+
+        with open(csv_file_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(rows)
+
+        logger.info(f"Exported {len(rows)} calls to {csv_file_path}")
+        return len(rows)
+
 # Global call logger instance
 _call_logger = None
 
 def get_call_logger() -> CallLogger:
-    """Get a singleton CallLogger instance"""
+    """Get a singleton CallLogger instance (CALL_LOG_BACKEND=sqlite selects SQLite)"""
     global _call_logger
     if _call_logger is None:
-        _call_logger = CallLogger()
+        if os.getenv('CALL_LOG_BACKEND', 'csv').lower() == 'sqlite':
+            _call_logger = SQLiteCallLogger(os.getenv('CALL_LOG_DB_PATH'))
+        else:
+            _call_logger = CallLogger()
     return _call_logger
 
 def log_call_quick(call_type: str, customer_name: str, customer_phone: str,
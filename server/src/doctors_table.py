@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Departments with a full staff directory, indexed by department id
+DEPARTMENTS = ("Cardiology", "Orthopedic", "Dermatology")
+_DEPT_IDS = {name[:5].lower(): index for index, name in enumerate(DEPARTMENTS)}  # "ortho" matches Orthopedics too
+
+# Staff directory, one column per field. Shift hours run 0-24 and a shift that
+# ends before it starts runs past midnight; off days follow datetime.weekday()
+# (Monday=0).
+NAMES = (
+    "Dr. Rajesh Kumar", "Dr. Priya Sharma", "Dr. Amit Patel", "Dr. Sunita Reddy", "Dr. Vikram Singh",
+    "Dr. Arjun Mehta", "Dr. Kavya Nair", "Dr. Rohit Gupta", "Dr. Meera Joshi", "Dr. Deepak Sharma",
+    "Dr. Neha Agarwal", "Dr. Ravi Krishnan", "Dr. Sanjay Iyer", "Dr. Priyanka Jain", "Dr. Manish Gupta",
+)
+SPECIALTIES = (
+    "Senior Cardiologist", "Interventional Cardiologist", "Cardiac Surgeon", "Pediatric Cardiologist", "Electrophysiologist",
+    "Joint Replacement Specialist", "Spine Surgeon", "Sports Medicine", "Trauma Surgeon", "Pediatric Orthopedics",
+    "General Dermatologist", "Cosmetic Dermatologist", "Pediatric Dermatologist", "Aesthetic Dermatologist", "Dermatopathologist",
+)
+DEPT_ID = np.array([0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2], dtype=np.uint8)
+SHIFT_START = np.array([6, 14, 22, 8, 16, 7, 15, 6, 23, 13, 8, 14, 9, 16, 7], dtype=np.uint8)
+SHIFT_END = np.array([14, 22, 6, 16, 24, 15, 23, 14, 7, 21, 16, 22, 17, 24, 15], dtype=np.uint8)
+OFF_DAY = np.array([6, 0, 1, 2, 3, 4, 5, 6, 0, 1, 2, 3, 4, 5, 6], dtype=np.uint8)
+FEE = np.array([1500, 2000, 2500, 1800, 2200, 1800, 1600, 1000, 1400, 1200, 800, 1200, 900, 1100, 1000], dtype=np.uint16)
+
+_OVERNIGHT = SHIFT_END < SHIFT_START
+
+def _clock(hour: int) -> str:
+    """Format an hour of the day as a 12-hour clock time"""
+    return f"{(hour - 1) % 12 + 1} {'AM' if hour % 24 < 12 else 'PM'}"
+
+_SHIFTS = tuple(f"{_clock(int(start))} - {_clock(int(end))}" for start, end in zip(SHIFT_START, SHIFT_END))
+
+def department_id(department: str) -> Optional[int]:
+    """Look up a department by name (e.g. 'Cardiology', 'orthopedics'); None if it has no directory"""
+    return _DEPT_IDS.get(department.strip()[:5].lower())
+
+def available_doctors(dept: int, weekday: int, hour: int) -> List[Dict[str, Any]]:
+    """Doctors of a department who are on shift at the given weekday and hour"""
+    on_shift = np.where(_OVERNIGHT,
+                        (SHIFT_START <= hour) | (hour < SHIFT_END),
+                        (SHIFT_START <= hour) & (hour < SHIFT_END))
+    # The early hours of an overnight shift belong to the shift that started the day before
+    shift_day = np.where(_OVERNIGHT & (hour < SHIFT_END), (weekday - 1) % 7, weekday)
+    matches = np.flatnonzero((DEPT_ID == dept) & (OFF_DAY != shift_day) & on_shift)
+    return [
+        {
+            "name": NAMES[i],
+            "specialty": SPECIALTIES[i],
+            "shift": _SHIFTS[i],
+            "consultation_fee": int(FEE[i])
+        }
+        for i in matches
+    ]
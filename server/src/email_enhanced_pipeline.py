@@ -1,5 +1,6 @@
 import asyncio
 import os
+import sys
 import logging
 from typing import Any, Awaitable, Dict
 
@@ -8,10 +9,17 @@ from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineTask
 
-from voice_email_handler import get_voice_email_handler
+from voice_email_handler import get_voice_email_handler, EMAIL_INTENT_RE
 
 logger = logging.getLogger(__name__)
 
+# Conversation markers appended to the user's text for each email action
+_EMAIL_ACTION_TAGS = {
+    'email_sent': 'EMAIL_SENT',            # Email was sent successfully
+    'collect_email_info': 'EMAIL_REQUEST',  # Need more info - let the AI ask for it
+    'email_failed': 'EMAIL_ERROR',         # Email failed - inform the user
+}
+
 class EmailEnhancedPipelineTask(PipelineTask):
     """Enhanced pipeline task that can handle email functionality"""
 
@@ -27,8 +35,9 @@ class EmailEnhancedPipelineTask(PipelineTask):
     async def process_frame(self, frame, direction):
         """Process frames and intercept text for email functionality"""
 
-        # Check if this is a text frame from the user
-        if isinstance(frame, TextFrame) and direction == "downstream":
+        # Check if this is a text frame from the user that could be an email request;
+        # the handler takes no action on text without an email intent phrase
+        if isinstance(frame, TextFrame) and direction == "downstream" and EMAIL_INTENT_RE.search(frame.text):
             try:
                 # Process the text for email commands
                 email_result = self.voice_email_handler.process_voice_command(
@@ -40,21 +49,10 @@ class EmailEnhancedPipelineTask(PipelineTask):
                 if email_result['action'] != 'none':
                     logger.info(f"Email action detected: {email_result['action']}")
 
-                    # Handle different email actions
-                    if email_result['action'] == 'email_sent':
-                        # Email was sent successfully - add confirmation to the conversation
-                        enhanced_text = frame.text + f"\n\nEMAIL_SENT: {email_result['message']}"
-                        frame = TextFrame(enhanced_text)
-
-                    elif email_result['action'] == 'collect_email_info':
-                        # Need more info - let the AI ask for it
-                        enhanced_text = frame.text + f"\n\nEMAIL_REQUEST: {email_result['message']}"
-                        frame = TextFrame(enhanced_text)
-
-                    elif email_result['action'] == 'email_failed':
-                        # Email failed - inform the user
-                        enhanced_text = frame.text + f"\n\nEMAIL_ERROR: {email_result['message']}"
-                        frame = TextFrame(enhanced_text)
+                    # Tag the user's text so the model knows what happened
+                    tag = _EMAIL_ACTION_TAGS.get(email_result['action'])
+                    if tag:
+                        frame = TextFrame(f"{frame.text}\n\n{tag}: {email_result['message']}")
 
             except Exception as e:
                 logger.error(f"Error processing email functionality: {str(e)}")
@@ -62,10 +60,8 @@ class EmailEnhancedPipelineTask(PipelineTask):
         # Continue with normal pipeline processing
         return await super().process_frame(frame, direction)
 
-def create_email_enhanced_system_instruction() -> str:
-    """Create enhanced system instruction that includes email capabilities"""
-
-    base_instruction = """Context:
+# Email-aware system instruction; built once at import and shared by every session
+_EMAIL_SYSTEM_INSTRUCTION = sys.intern("""Context:
 
 Current date and time: {{now}}
 
@@ -139,9 +135,11 @@ IMPORTANT: ALWAYS CHECK calendar_slots BEFORE YOU ASK "Do you have a preferred t
 
 	5.	She mentions only 2–3 available slots (unless the patient asks "Is later possible?").
 
-• Always confirm the final choice."""
+• Always confirm the final choice.""")
 
-    return base_instruction
+def create_email_enhanced_system_instruction() -> str:
+    """Create enhanced system instruction that includes email capabilities"""
+    return _EMAIL_SYSTEM_INSTRUCTION
 
 def create_enhanced_pipeline_runner(handle_sigint: bool = False) -> PipelineRunner:
     """Create a pipeline runner with email capabilities"""
@@ -3,15 +3,96 @@
 from pipecat.adapters.schemas.function_schema import FunctionSchema
 from pipecat.adapters.schemas.tools_schema import ToolsSchema
 from pipecat.services.llm_service import FunctionCallParams
+from aiolimiter import AsyncLimiter
 from gmail_service import get_gmail_service
-from calendar_service import get_calendar_service
+from calendar_service import get_calendar_service, parse_appointment_datetime
+from google_sheets_service import get_sheets_service
 from call_logger import get_call_logger, CallType, CustomerType, CallStatus
 from language_support import get_language_manager
+from doctors_table import DEPARTMENTS, department_id, available_doctors
+import asyncio
+import functools
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Blocking Sheets work runs here so handlers never stall the pipeline's event
+# loop (Calendar and Gmail calls use their services' own async methods)
+_IO_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="appt-io")
+
+async def _run(fn, *args, **kwargs):
+    """Run a blocking call on the I/O pool"""
+    return await asyncio.get_running_loop().run_in_executor(_IO_POOL, functools.partial(fn, *args, **kwargs))
+
+# Gmail messages.send costs 100 of the 15,000 quota units per user-minute
+# (150 sends/min); cap concurrency and keep some headroom under the rate
+_GMAIL_SEND_SEM = asyncio.Semaphore(8)
+_GMAIL_LIMITER = AsyncLimiter(140, 60)
+
+async def _send_email(gmail_service, **kwargs):
+    """Send an email through Gmail within the per-user send quota"""
+    async with _GMAIL_SEND_SEM, _GMAIL_LIMITER:
+        return await gmail_service.send_simple_email_async(**kwargs)
+
+# Sheets lookups by phone number: phone -> (expires_at, patient or None). Misses
+# are kept for a shorter time so a patient registered elsewhere shows up soon.
+_PATIENT_CACHE_TTL = 300
+_PATIENT_MISS_TTL = 60
+_PATIENT_CACHE_MAX_ENTRIES = 2048
+_PATIENT_LOOKUP_TIMEOUT = 2.0  # A slow Sheets read shouldn't hold up the call; treat as a new patient
+_patient_cache = {}
+_patient_lookups = {}  # phone -> in-flight Sheets lookup, shared by concurrent callers
+_patient_generation = 0  # bumped by _invalidate_patient so lookups started earlier aren't cached
+
+async def _lookup_patient(sheets_service, phone_number: str):
+    """Find a patient by phone, reusing recent results and any lookup already in flight"""
+    now = time.monotonic()
+    cached = _patient_cache.get(phone_number)
+    if cached and now < cached[0]:
+        return cached[1]
+
+    generation = _patient_generation
+    lookup = _patient_lookups.get(phone_number)
+    if lookup is None:
+        lookup = asyncio.ensure_future(_run(sheets_service.get_patient_by_phone, phone_number))
+        _patient_lookups[phone_number] = lookup
+        lookup.add_done_callback(
+            lambda done: _patient_lookups.pop(phone_number) if _patient_lookups.get(phone_number) is done else None
+        )
+    patient = await asyncio.shield(lookup)  # a caller timing out mustn't cancel the shared lookup
+
+    if generation != _patient_generation:
+        return patient  # invalidated while in flight; the result may predate a booking
+
+    _patient_cache.pop(phone_number, None)  # re-insert at the end so dict order is write order
+    if len(_patient_cache) >= _PATIENT_CACHE_MAX_ENTRIES:
+        for stale in [k for k, v in _patient_cache.items() if now >= v[0]]:
+            del _patient_cache[stale]
+        while len(_patient_cache) >= _PATIENT_CACHE_MAX_ENTRIES:
+            del _patient_cache[next(iter(_patient_cache))]  # nothing expired: drop the oldest
+    _patient_cache[phone_number] = (now + (_PATIENT_CACHE_TTL if patient else _PATIENT_MISS_TTL), patient)
+    return patient
+
+def _invalidate_patient(phone_number: str):
+    """Forget a cached patient, including any lookup still in flight"""
+    global _patient_generation
+    _patient_generation += 1
+    _patient_cache.pop(phone_number, None)
+    _patient_lookups.pop(phone_number, None)
+
+# Language manager is plain in-memory data, so resolve it once at import
+_LANG = get_language_manager()
+
+# Call log values used by the handlers, as plain strings
+_CALL_TYPE_BOOKING = CallType.APPOINTMENT_BOOKING.value
+_CALL_TYPE_CANCELLATION = CallType.APPOINTMENT_CANCELLATION.value
+_STATUS_RESOLVED = CallStatus.RESOLVED.value
+_STATUS_PARTIALLY_RESOLVED = CallStatus.PARTIALLY_RESOLVED.value
+_STATUS_UNRESOLVED = CallStatus.UNRESOLVED.value
+
 # Define the check availability function schema
 check_availability_function = FunctionSchema(
     name="check_appointment_availability",
@@ -188,25 +269,70 @@ detect_customer_function = FunctionSchema(
     required=["phone_number", "patient_name"]
 )
 
+# Customer detection and availability check in one call
+prepare_booking_function = FunctionSchema(
+    name="prepare_booking",
+    description="Check customer type by phone number and check if the requested appointment slot is available, in one call",
+    properties={
+        "phone_number": {
+            "type": "string",
+            "description": "Patient's phone number to check in database"
+        },
+        "patient_name": {
+            "type": "string",
+            "description": "Patient's name for verification"
+        },
+        "appointment_date": {
+            "type": "string",
+            "description": "Date of the appointment (YYYY-MM-DD format, e.g., 2024-01-15)"
+        },
+        "appointment_time": {
+            "type": "string",
+            "description": "Time of the appointment (e.g., 10:00 AM)"
+        },
+        "duration_minutes": {
+            "type": "integer",
+            "description": "Duration of appointment in minutes (default: 30)"
+        }
+    },
+    required=["phone_number", "patient_name", "appointment_date", "appointment_time"]
+)
+
+# Doctor schedule lookup schema
+find_available_doctors_function = FunctionSchema(
+    name="find_available_doctors",
+    description="List the doctors of a department who are on shift at a given date and time, with their consultation fees",
+    properties={
+        "department": {
+            "type": "string",
+            "description": "Hospital department",
+            "enum": list(DEPARTMENTS)
+        },
+        "appointment_date": {
+            "type": "string",
+            "description": "Date of the appointment (YYYY-MM-DD format, e.g., 2024-01-15)"
+        },
+        "appointment_time": {
+            "type": "string",
+            "description": "Time of the appointment (e.g., 10:00 AM)"
+        }
+    },
+    required=["department", "appointment_date", "appointment_time"]
+)
+
 # Create tools schema with all appointment functions
-enhanced_appointment_tools = ToolsSchema(standard_tools=[
+enhanced_appointment_tools = ToolsSchema(standard_tools=(
+    prepare_booking_function,
+    find_available_doctors_function,
     detect_customer_function,
     check_availability_function,
     book_appointment_function,
     cancel_appointment_function,
     log_call_info_function
-])
-
-def create_appointment_email_html(patient_name: str, email: str, phone: str,
-                                appointment_date: str, appointment_time: str,
-                                doctor_name: str, department: str) -> tuple[str, str]:
-    """Create HTML email content for appointment confirmation"""
-
-    # Create subject
-    subject = f"Appointment Confirmed - Renova Hospitals - {appointment_date}"
+))
 
-    # Create HTML body
-    body = f"""
+# Appointment confirmation email body, filled in per booking
+_APPOINTMENT_EMAIL_HTML = """
     <html>
     <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
         <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
@@ -268,478 +394,531 @@ def create_appointment_email_html(patient_name: str, email: str, phone: str,
         </div>
     </body>
     </html>
-    """
+    """.format_map
 
-    return subject, body
-
-async def handle_check_appointment_availability(params: FunctionCallParams):
-    """Handle checking appointment availability and suggest alternatives"""
-    try:
-        function_args = params.arguments
-        appointment_date = function_args.get("appointment_date")
-        appointment_time = function_args.get("appointment_time")
-        duration_minutes = function_args.get("duration_minutes", 30)
-
-        print(f"=== FUNCTION CALL: check_appointment_availability ===")
-        print(f"Date: {appointment_date}")
-        print(f"Time: {appointment_time}")
-        print(f"Duration: {duration_minutes} minutes")
-
-        # Check availability using calendar service
-        calendar_service = get_calendar_service()
-        availability_result = calendar_service.check_availability(
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            duration_minutes=duration_minutes
-        )
+# Cancellation email, filled in per cancellation
+_CANCEL_EMAIL_SUBJECT = "Appointment Cancelled - Renova Hospitals - {appointment_date}".format
+_CANCEL_EMAIL_BODY = """Dear {patient_name},
 
-        if availability_result.get('success'):
-            if availability_result.get('available'):
-                print(f"=== [AVAILABLE] Time slot is free ===")
-                await params.result_callback({
-                    "success": True,
-                    "available": True,
-                    "message": availability_result.get('message'),
-                    "requested_slot": availability_result.get('requested_slot')
-                })
-            else:
-                print(f"=== [UNAVAILABLE] Time slot is busy, suggesting alternatives ===")
-                lang_manager = get_language_manager()
-                alternatives_text = lang_manager.format_alternative_slots(
-                    availability_result.get('alternatives', [])
-                )
-                await params.result_callback({
-                    "success": True,
-                    "available": False,
-                    "message": availability_result.get('message'),
-                    "conflicts": availability_result.get('conflicts', []),
-                    "alternatives": availability_result.get('alternatives', []),
-                    "alternatives_formatted": alternatives_text
-                })
-        else:
-            error_msg = availability_result.get('error', 'Failed to check availability')
-            print(f"=== [ERROR] {error_msg} ===")
-            await params.result_callback({
-                "success": False,
-                "error": error_msg,
-                "message": "I couldn't check the availability right now. Please try again."
-            })
+Your appointment has been successfully cancelled:
 
-    except Exception as e:
-        error_msg = f"Error checking availability: {str(e)}"
-        print(f"=== [ERROR] {error_msg} ===")
-        logger.error(error_msg)
-        await params.result_callback({
-            "success": False,
-            "error": error_msg,
-            "message": "There was an error checking availability. Please try again."
-        })
+Doctor: {doctor_name}
+Date: {appointment_date}
+Time: {appointment_time}
 
-async def handle_book_appointment(params: FunctionCallParams):
-    """Handle booking appointment with email, calendar, and call logging"""
-    try:
-        function_args = params.arguments
-
-        patient_name = function_args.get("patient_name")
-        email = function_args.get("email")
-        phone = function_args.get("phone", "Not provided")
-        appointment_date = function_args.get("appointment_date")
-        appointment_time = function_args.get("appointment_time")
-        doctor_name = function_args.get("doctor_name")
-        department = function_args.get("department")
-        customer_type = function_args.get("customer_type", "unknown")
-        language_used = function_args.get("language_used", "english")
-
-        print(f"=== FUNCTION CALL: book_appointment ===")
-        print(f"Patient: {patient_name}")
-        print(f"Email: {email}")
-        print(f"Phone: {phone}")
-        print(f"Date: {appointment_date}")
-        print(f"Time: {appointment_time}")
-        print(f"Doctor: {doctor_name}")
-        print(f"Department: {department}")
-        print(f"Customer Type: {customer_type}")
-        print(f"Language: {language_used}")
-
-        # Validate required fields
-        if not all([patient_name, email, appointment_date, appointment_time, doctor_name, department]):
-            error_msg = "Missing required appointment details"
-            print(f"=== [ERROR] {error_msg} ===")
-            await params.result_callback({
-                "success": False,
-                "error": error_msg,
-                "message": "Please provide all required appointment details."
-            })
-            return
-
-        # 1. Double-check availability before booking
-        calendar_service = get_calendar_service()
-        availability_check = calendar_service.check_availability(
-            appointment_date=appointment_date,
-            appointment_time=appointment_time
-        )
+If you need to reschedule, please call us.
 
-        if not availability_check.get('available', True):  # Default to True if check fails
-            lang_manager = get_language_manager()
-            alternatives_text = lang_manager.format_alternative_slots(
-                availability_check.get('alternatives', [])
-            )
-            await params.result_callback({
-                "success": False,
-                "available": False,
-                "message": "Sorry, that time slot is no longer available. Please choose from these alternatives.",
-                "alternatives": availability_check.get('alternatives', []),
-                "alternatives_formatted": alternatives_text
-            })
-            return
-
-        # 2. Create email content
-        subject, body = create_appointment_email_html(
-            patient_name, email, phone, appointment_date,
-            appointment_time, doctor_name, department
-        )
+Thank you,
+Renova Hospitals""".format
 
-        # 3. Send email
-        gmail_service = get_gmail_service()
-        email_result = gmail_service.send_simple_email(
-            to=email,
-            subject=subject,
-            body=body,
-            is_html=True
-        )
+def create_appointment_email_html(patient_name: str, email: str, phone: str,
+                                appointment_date: str, appointment_time: str,
+                                doctor_name: str, department: str) -> tuple[str, str]:
+    """Create HTML email content for appointment confirmation"""
 
-        # 4. Add to calendar
-        calendar_result = calendar_service.create_appointment_event(
-            patient_name=patient_name,
-            patient_email=email,
-            patient_phone=phone,
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            doctor_name=doctor_name,
-            department=department
-        )
+    # Create subject
+    subject = f"Appointment Confirmed - Renova Hospitals - {appointment_date}"
 
-        # 5. Log the call
-        call_logger = get_call_logger()
-        call_data = {
-            "call_type": CallType.APPOINTMENT_BOOKING.value,
-            "customer_name": patient_name,
-            "caller_phone": phone,
-            "customer_email": email,
-            "customer_type": customer_type,
-            "department_enquired": department,
-            "doctor_enquired": doctor_name,
-            "appointment_date": appointment_date,
-            "appointment_time": appointment_time,
-            "language_used": language_used,
-            "call_summary": f"Appointment booking for {patient_name} with {doctor_name} on {appointment_date} at {appointment_time}",
-            "resolution_status": CallStatus.RESOLVED.value if email_result.get('success') and calendar_result.get('success') else CallStatus.PARTIALLY_RESOLVED.value,
-            "agent_notes": f"Email: {'sent' if email_result.get('success') else 'failed'}, Calendar: {'added' if calendar_result.get('success') else 'failed'}"
-        }
-        call_logger.log_call(call_data)
+    # Fill in the precompiled HTML body
+    body = _APPOINTMENT_EMAIL_HTML(locals())
 
-        # 6. Evaluate results and respond
-        email_success = email_result.get('success', False)
-        calendar_success = calendar_result.get('success', False)
+    return subject, body
 
-        if email_success and calendar_success:
-            lang_manager = get_language_manager()
-            confirmation_text = lang_manager.format_appointment_confirmation(
-                patient_name, doctor_name, appointment_date, appointment_time, language_used
-            )
+def safe_handler(action: str, message: str):
+    """Report any exception raised by a function-call handler back to the LLM"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(params: FunctionCallParams):
+            try:
+                await handler(params)
+            except Exception as e:
+                error_msg = f"Error {action}: {str(e)}"
+                logger.error(error_msg)
+                await params.result_callback({
+                    "success": False,
+                    "error": error_msg,
+                    "message": message
+                })
+        return wrapper
+    return decorator
 
-            success_msg = f"Appointment confirmed! Email sent to {email} and added to hospital calendar."
-            print(f"=== [SUCCESS] Email + Calendar: {success_msg} ===")
-            await params.result_callback({
+@safe_handler("checking availability", "There was an error checking availability. Please try again.")
+async def handle_check_appointment_availability(params: FunctionCallParams):
+    """Handle checking appointment availability and suggest alternatives"""
+    get = params.arguments.get
+    appointment_date = get("appointment_date")
+    appointment_time = get("appointment_time")
+    duration_minutes = get("duration_minutes", 30)
+
+    logger.debug("check_appointment_availability date=%s time=%s duration=%s",
+                 appointment_date, appointment_time, duration_minutes)
+
+    await params.result_callback(await _check_availability(appointment_date, appointment_time, duration_minutes))
+
+async def _check_availability(appointment_date: str, appointment_time: str, duration_minutes: int) -> dict:
+    """Check a slot with the calendar and build the availability result for the LLM"""
+    # Check availability using calendar service
+    calendar_service = get_calendar_service()
+    availability_result = await calendar_service.check_availability_async(
+        appointment_date=appointment_date,
+        appointment_time=appointment_time,
+        duration_minutes=duration_minutes
+    )
+
+    if availability_result.get('success'):
+        if availability_result.get('available'):
+            logger.debug("Time slot is free")
+            return {
                 "success": True,
-                "message": success_msg,
-                "confirmation_text": confirmation_text,
-                "email_sent_to": email,
-                "calendar_event_id": calendar_result.get('event_id'),
-                "email_message_id": email_result.get('message_id'),
-                "appointment_details": {
-                    "patient": patient_name,
-                    "date": appointment_date,
-                    "time": appointment_time,
-                    "doctor": doctor_name,
-                    "department": department
-                }
-            })
+                "available": True,
+                "message": availability_result.get('message'),
+                "requested_slot": availability_result.get('requested_slot')
+            }
         else:
-            # Handle partial success or failure
-            error_parts = []
-            if not email_success:
-                error_parts.append(f"Email: {email_result.get('error')}")
-            if not calendar_success:
-                error_parts.append(f"Calendar: {calendar_result.get('error')}")
-
-            error_msg = "; ".join(error_parts)
-            print(f"=== [PARTIAL/ERROR] {error_msg} ===")
-            await params.result_callback({
-                "success": email_success or calendar_success,
-                "message": "Appointment partially processed. Please contact us to confirm all details.",
-                "error": error_msg,
-                "email_success": email_success,
-                "calendar_success": calendar_success
-            })
-
-    except Exception as e:
-        error_msg = f"Error booking appointment: {str(e)}"
-        print(f"=== [ERROR] {error_msg} ===")
-        logger.error(error_msg)
-        await params.result_callback({
+            logger.debug("Time slot is busy, suggesting alternatives")
+            alternatives = availability_result.get('alternatives') or []
+            return {
+                "success": True,
+                "available": False,
+                "message": availability_result.get('message'),
+                "conflicts": availability_result.get('conflicts', []),
+                "alternatives": alternatives,
+                "alternatives_formatted": _LANG.formatter_for().alternative_slots(alternatives) if alternatives else ""
+            }
+    else:
+        error_msg = availability_result.get('error', 'Failed to check availability')
+        logger.warning(error_msg)
+        return {
             "success": False,
             "error": error_msg,
-            "message": "There was an error booking your appointment. Please contact us directly."
-        })
-
-async def handle_cancel_appointment(params: FunctionCallParams):
-    """Handle appointment cancellation with verification"""
-    try:
-        function_args = params.arguments
-
-        patient_name = function_args.get("patient_name")
-        patient_email = function_args.get("patient_email", "")
-        patient_phone = function_args.get("patient_phone", "")
-        appointment_date = function_args.get("appointment_date")
-        appointment_time = function_args.get("appointment_time")
-        doctor_name = function_args.get("doctor_name")
-        language_used = function_args.get("language_used", "english")
-
-        print(f"=== FUNCTION CALL: cancel_appointment ===")
-        print(f"Patient: {patient_name}")
-        print(f"Email: {patient_email}")
-        print(f"Phone: {patient_phone}")
-        print(f"Date: {appointment_date}")
-        print(f"Time: {appointment_time}")
-        print(f"Doctor: {doctor_name}")
-        print(f"Language: {language_used}")
-
-        # Validate required fields
-        if not all([patient_name, appointment_date, appointment_time, doctor_name]):
-            error_msg = "Missing required cancellation details"
-            print(f"=== [ERROR] {error_msg} ===")
-            await params.result_callback({
-                "success": False,
-                "error": error_msg,
-                "message": "Please provide patient name, doctor name, appointment date and time for cancellation."
-            })
-            return
-
-        # Cancel appointment using calendar service
-        calendar_service = get_calendar_service()
-        cancellation_result = calendar_service.cancel_appointment(
-            patient_name=patient_name,
-            patient_email=patient_email,
-            patient_phone=patient_phone,
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            doctor_name=doctor_name
-        )
-
-        # Log the cancellation call
-        call_logger = get_call_logger()
-        call_data = {
-            "call_type": CallType.APPOINTMENT_CANCELLATION.value,
-            "customer_name": patient_name,
-            "caller_phone": patient_phone,
-            "customer_email": patient_email,
-            "doctor_enquired": doctor_name,
-            "appointment_date": appointment_date,
-            "appointment_time": appointment_time,
-            "language_used": language_used,
-            "call_summary": f"Appointment cancellation request for {patient_name} with {doctor_name} on {appointment_date} at {appointment_time}",
-            "resolution_status": CallStatus.RESOLVED.value if cancellation_result.get('success') else CallStatus.UNRESOLVED.value,
-            "agent_notes": f"Cancellation: {'successful' if cancellation_result.get('success') else 'failed - ' + cancellation_result.get('error', 'unknown error')}"
+            "message": "I couldn't check the availability right now. Please try again."
         }
-        call_logger.log_call(call_data)
-
-        if cancellation_result.get('success'):
-            success_msg = cancellation_result.get('message')
-            print(f"=== [SUCCESS] {success_msg} ===")
-
-            # Send cancellation email if email is provided
-            if patient_email:
-                gmail_service = get_gmail_service()
-                cancellation_email_result = gmail_service.send_simple_email(
-                    to=patient_email,
-                    subject=f"Appointment Cancelled - Renova Hospitals - {appointment_date}",
-                    body=f"""Dear {patient_name},
 
-Your appointment has been successfully cancelled:
-
-Doctor: {doctor_name}
-Date: {appointment_date}
-Time: {appointment_time}
-
-If you need to reschedule, please call us.
-
-Thank you,
-Renova Hospitals"""
-                )
-
-            await params.result_callback({
-                "success": True,
-                "message": success_msg,
-                "cancelled_appointment": cancellation_result.get('cancelled_appointment'),
-                "email_sent": bool(patient_email)
-            })
-        else:
-            error_msg = cancellation_result.get('error')
-            print(f"=== [ERROR] {error_msg} ===")
-            await params.result_callback({
-                "success": False,
-                "error": error_msg,
-                "message": "Could not cancel the appointment. Please verify the details and try again.",
-                "provided_details": cancellation_result.get('provided_details')
-            })
-
-    except Exception as e:
-        error_msg = f"Error cancelling appointment: {str(e)}"
-        print(f"=== [ERROR] {error_msg} ===")
-        logger.error(error_msg)
+@safe_handler("booking appointment", "There was an error booking your appointment. Please contact us directly.")
+async def handle_book_appointment(params: FunctionCallParams):
+    """Handle booking appointment with email, calendar, and call logging"""
+    get = params.arguments.get
+
+    patient_name = get("patient_name")
+    email = get("email")
+    phone = get("phone", "Not provided")
+    appointment_date = get("appointment_date")
+    appointment_time = get("appointment_time")
+    doctor_name = get("doctor_name")
+    department = get("department")
+    customer_type = get("customer_type", "unknown")
+    language_used = get("language_used", "english")
+
+    logger.debug("book_appointment patient=%s email=%s phone=%s date=%s time=%s doctor=%s "
+                 "department=%s customer_type=%s language=%s",
+                 patient_name, email, phone, appointment_date, appointment_time,
+                 doctor_name, department, customer_type, language_used)
+
+    # Validate required fields
+    if not (patient_name and email and appointment_date and appointment_time and doctor_name and department):
+        error_msg = "Missing required appointment details"
+        logger.warning(error_msg)
         await params.result_callback({
             "success": False,
             "error": error_msg,
-            "message": "There was an error cancelling your appointment. Please contact us directly."
+            "message": "Please provide all required appointment details."
         })
+        return
+
+    calendar_service = get_calendar_service()
+    gmail_service = get_gmail_service()
+    booking = {
+        "patient_name": patient_name,
+        "patient_email": email,
+        "patient_phone": phone,
+        "appointment_date": appointment_date,
+        "appointment_time": appointment_time,
+        "doctor_name": doctor_name,
+        "department": department
+    }
+
+    # 1. Create email content
+    subject, body = create_appointment_email_html(
+        patient_name, email, phone, appointment_date,
+        appointment_time, doctor_name, department
+    )
+
+    # 2. Re-check the slot and add to calendar in one batched round trip
+    calendar_result = await calendar_service.book_with_conflict_check_async(**booking)
+
+    if calendar_result.get('available') is False:
+        alternatives = calendar_result.get('alternatives') or []
+        await params.result_callback({
+            "success": False,
+            "available": False,
+            "message": "Sorry, that time slot is no longer available. Please choose from these alternatives.",
+            "alternatives": alternatives,
+            "alternatives_formatted": _LANG.formatter_for().alternative_slots(alternatives) if alternatives else ""
+        })
+        return
 
-async def handle_log_call_information(params: FunctionCallParams):
-    """Handle logging comprehensive call information"""
+    # 3. Send email once the slot check has passed; if the calendar insert itself
+    # failed, the email still goes out and the booking is reported as partial
     try:
-        function_args = params.arguments
-
-        customer_name = function_args.get("customer_name")
-        customer_phone = function_args.get("customer_phone", "")
-        customer_email = function_args.get("customer_email", "")
-        call_type = function_args.get("call_type")
-        customer_type = function_args.get("customer_type", "unknown")
-        department_enquired = function_args.get("department_enquired", "")
-        doctor_enquired = function_args.get("doctor_enquired", "")
-        call_summary = function_args.get("call_summary")
-        resolution_status = function_args.get("resolution_status", "resolved")
-        language_used = function_args.get("language_used", "english")
-
-        print(f"=== FUNCTION CALL: log_call_information ===")
-        print(f"Customer: {customer_name}")
-        print(f"Phone: {customer_phone}")
-        print(f"Type: {call_type}")
-        print(f"Summary: {call_summary}")
-        print(f"Language: {language_used}")
-
-        # Log the call
-        call_logger = get_call_logger()
-        call_data = {
-            "call_type": call_type,
-            "customer_name": customer_name,
-            "caller_phone": customer_phone,
-            "customer_email": customer_email,
-            "customer_type": customer_type,
-            "department_enquired": department_enquired,
-            "doctor_enquired": doctor_enquired,
-            "call_summary": call_summary,
-            "language_used": language_used,
-            "resolution_status": resolution_status,
-            "agent_notes": "Call logged via voice agent function calling"
-        }
-
-        call_id = call_logger.log_call(call_data)
+        email_result = await _send_email(gmail_service, to=email, subject=subject, body=body, is_html=True)
+    except Exception as e:
+        email_result = {'success': False, 'error': str(e)}
+
+    email_success = bool(email_result.get('success'))
+    calendar_success = bool(calendar_result.get('success'))
+
+    # 4. Log the call
+    call_logger = get_call_logger()
+    call_data = {
+        "call_type": _CALL_TYPE_BOOKING,
+        "customer_name": patient_name,
+        "caller_phone": phone,
+        "customer_email": email,
+        "customer_type": customer_type,
+        "department_enquired": department,
+        "doctor_enquired": doctor_name,
+        "appointment_date": appointment_date,
+        "appointment_time": appointment_time,
+        "language_used": language_used,
+        "call_summary": f"Appointment booking for {patient_name} with {doctor_name} on {appointment_date} at {appointment_time}",
+        "resolution_status": _STATUS_RESOLVED if email_success and calendar_success else _STATUS_PARTIALLY_RESOLVED,
+        "agent_notes": f"Email: {'sent' if email_success else 'failed'}, Calendar: {'added' if calendar_success else 'failed'}"
+    }
+    await call_logger.log_call_async(call_data)  # queued; written in the background
+
+    # 5. Evaluate results and respond
+    if email_success and calendar_success:
+        _invalidate_patient(phone)  # the caller's patient details may have changed
+        confirmation_text = _LANG.formatter_for(language_used).appointment_confirmation(
+            patient_name, doctor_name, appointment_date, appointment_time
+        )
 
-        print(f"=== [SUCCESS] Call logged with ID: {call_id} ===")
+        success_msg = f"Appointment confirmed! Email sent to {email} and added to hospital calendar."
+        logger.debug("Email + Calendar: %s", success_msg)
         await params.result_callback({
             "success": True,
-            "message": "Call information logged successfully",
-            "call_id": call_id
+            "message": success_msg,
+            "confirmation_text": confirmation_text,
+            "email_sent_to": email,
+            "calendar_event_id": calendar_result.get('event_id'),
+            "email_message_id": email_result.get('message_id'),
+            "appointment_details": {
+                "patient": patient_name,
+                "date": appointment_date,
+                "time": appointment_time,
+                "doctor": doctor_name,
+                "department": department
+            }
+        })
+    else:
+        # Handle partial success or failure
+        error_parts = []
+        if not email_success:
+            error_parts.append(f"Email: {email_result.get('error')}")
+        if not calendar_success:
+            error_parts.append(f"Calendar: {calendar_result.get('error')}")
+
+        error_msg = "; ".join(error_parts)
+        logger.warning("Booking partially failed: %s", error_msg)
+        await params.result_callback({
+            "success": email_success or calendar_success,
+            "message": "Appointment partially processed. Please contact us to confirm all details.",
+            "error": error_msg,
+            "email_success": email_success,
+            "calendar_success": calendar_success
         })
 
-    except Exception as e:
-        error_msg = f"Error logging call: {str(e)}"
-        print(f"=== [ERROR] {error_msg} ===")
-        logger.error(error_msg)
+@safe_handler("cancelling appointment", "There was an error cancelling your appointment. Please contact us directly.")
+async def handle_cancel_appointment(params: FunctionCallParams):
+    """Handle appointment cancellation with verification"""
+    get = params.arguments.get
+
+    patient_name = get("patient_name")
+    patient_email = get("patient_email", "")
+    patient_phone = get("patient_phone", "")
+    appointment_date = get("appointment_date")
+    appointment_time = get("appointment_time")
+    doctor_name = get("doctor_name")
+    language_used = get("language_used", "english")
+
+    logger.debug("cancel_appointment patient=%s email=%s phone=%s date=%s time=%s doctor=%s language=%s",
+                 patient_name, patient_email, patient_phone, appointment_date,
+                 appointment_time, doctor_name, language_used)
+
+    # Validate required fields
+    if not (patient_name and appointment_date and appointment_time and doctor_name):
+        error_msg = "Missing required cancellation details"
+        logger.warning(error_msg)
+        await params.result_callback({
+            "success": False,
+            "error": error_msg,
+            "message": "Please provide patient name, doctor name, appointment date and time for cancellation."
+        })
+        return
+
+    # Cancel appointment using calendar service
+    calendar_service = get_calendar_service()
+    cancellation_result = await calendar_service.cancel_appointment_async(
+        patient_name=patient_name,
+        patient_email=patient_email,
+        patient_phone=patient_phone,
+        appointment_date=appointment_date,
+        appointment_time=appointment_time,
+        doctor_name=doctor_name
+    )
+
+    # Log the cancellation call
+    call_logger = get_call_logger()
+    call_data = {
+        "call_type": _CALL_TYPE_CANCELLATION,
+        "customer_name": patient_name,
+        "caller_phone": patient_phone,
+        "customer_email": patient_email,
+        "doctor_enquired": doctor_name,
+        "appointment_date": appointment_date,
+        "appointment_time": appointment_time,
+        "language_used": language_used,
+        "call_summary": f"Appointment cancellation request for {patient_name} with {doctor_name} on {appointment_date} at {appointment_time}",
+        "resolution_status": _STATUS_RESOLVED if cancellation_result.get('success') else _STATUS_UNRESOLVED,
+        "agent_notes": f"Cancellation: {'successful' if cancellation_result.get('success') else 'failed - ' + cancellation_result.get('error', 'unknown error')}"
+    }
+    await call_logger.log_call_async(call_data)  # queued; written in the background
+
+    if cancellation_result.get('success'):
+        success_msg = cancellation_result.get('message')
+        logger.debug("Cancellation succeeded: %s", success_msg)
+
+        # The response doesn't depend on the email outcome, so the
+        # cancellation email goes out while the result is delivered
+        pending = [params.result_callback({
+            "success": True,
+            "message": success_msg,
+            "cancelled_appointment": cancellation_result.get('cancelled_appointment'),
+            "email_sent": bool(patient_email)
+        })]
+
+        # Send cancellation email if email is provided
+        if patient_email:
+            gmail_service = get_gmail_service()
+            pending.append(_send_email(
+                gmail_service,
+                to=patient_email,
+                subject=_CANCEL_EMAIL_SUBJECT(appointment_date=appointment_date),
+                body=_CANCEL_EMAIL_BODY(patient_name=patient_name, doctor_name=doctor_name,
+                                        appointment_date=appointment_date, appointment_time=appointment_time)
+            ))
+
+        for outcome in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error completing cancellation: {outcome}")
+    else:
+        error_msg = cancellation_result.get('error')
+        logger.warning(error_msg)
         await params.result_callback({
             "success": False,
             "error": error_msg,
-            "message": "Could not log call information"
+            "message": "Could not cancel the appointment. Please verify the details and try again.",
+            "provided_details": cancellation_result.get('provided_details')
         })
 
+@safe_handler("logging call", "Could not log call information")
+async def handle_log_call_information(params: FunctionCallParams):
+    """Handle logging comprehensive call information"""
+    get = params.arguments.get
+
+    customer_name = get("customer_name")
+    customer_phone = get("customer_phone", "")
+    customer_email = get("customer_email", "")
+    call_type = get("call_type")
+    customer_type = get("customer_type", "unknown")
+    department_enquired = get("department_enquired", "")
+    doctor_enquired = get("doctor_enquired", "")
+    call_summary = get("call_summary")
+    resolution_status = get("resolution_status", "resolved")
+    language_used = get("language_used", "english")
+
+    logger.debug("log_call_information customer=%s phone=%s type=%s summary=%s language=%s",
+                 customer_name, customer_phone, call_type, call_summary, language_used)
+
+    # Log the call
+    call_logger = get_call_logger()
+    call_data = {
+        "call_type": call_type,
+        "customer_name": customer_name,
+        "caller_phone": customer_phone,
+        "customer_email": customer_email,
+        "customer_type": customer_type,
+        "department_enquired": department_enquired,
+        "doctor_enquired": doctor_enquired,
+        "call_summary": call_summary,
+        "language_used": language_used,
+        "resolution_status": resolution_status,
+        "agent_notes": "Call logged via voice agent function calling"
+    }
+
+    call_id = await call_logger.log_call_async(call_data)  # ID is known before the write
+
+    logger.debug("Call logged with ID: %s", call_id)
+    await params.result_callback({
+        "success": True,
+        "message": "Call information logged successfully",
+        "call_id": call_id
+    })
+
+@safe_handler("detecting customer type", "I'll help you as a new patient.")
 async def handle_detect_customer_type(params: FunctionCallParams):
     """Handle customer detection and information retrieval"""
-    try:
-        function_args = params.arguments
-        phone_number = function_args.get("phone_number")
-        patient_name = function_args.get("patient_name")
+    get = params.arguments.get
+    phone_number = get("phone_number")
+    patient_name = get("patient_name")
 
-        print(f"=== FUNCTION CALL: detect_customer_type ===")
-        print(f"Phone: {phone_number}")
-        print(f"Name: {patient_name}")
+    logger.debug("detect_customer_type phone=%s name=%s", phone_number, patient_name)
 
-        # Get Google Sheets service - access global variable from main server
-        import pipecat_server
-        sheets_service = getattr(pipecat_server, 'global_sheets_service', None)
+    await params.result_callback(await _detect_customer(phone_number, patient_name))
 
-        customer_type = "new"
-        customer_info = None
+async def _detect_customer(phone_number: str, patient_name: str) -> dict:
+    """Look up the caller in Sheets and build the customer-type result for the LLM"""
+    # Shared Google Sheets service (the server registers its instance at startup)
+    try:
+        sheets_service = get_sheets_service()
+    except Exception as e:
+        logger.warning("Google Sheets unavailable: %s", e)
+        sheets_service = None
+
+    customer_type = "new"
+    customer_info = None
+
+    if sheets_service:
+        try:
+            # Check Google Sheets for existing customer
+            existing_patient = await asyncio.wait_for(_lookup_patient(sheets_service, phone_number),
+                                                      timeout=_PATIENT_LOOKUP_TIMEOUT)
+
+            if existing_patient:
+                customer_type = "returning"
+                customer_info = {
+                    "name": existing_patient.name,
+                    "email": existing_patient.email,
+                    "phone": existing_patient.phone,
+                    "preferred_doctor": existing_patient.preferred_doctor,
+                    "department": existing_patient.department,
+                    "language": existing_patient.language,
+                    "last_visit": existing_patient.last_visit
+                }
+                logger.debug("Returning customer found: %s", existing_patient.name)
+            else:
+                logger.debug("New customer, not found in database")
 
-        if sheets_service:
-            try:
-                # Check Google Sheets for existing customer
-                existing_patient = sheets_service.get_patient_by_phone(phone_number)
-
-                if existing_patient:
-                    customer_type = "returning"
-                    customer_info = {
-                        "name": existing_patient.name,
-                        "email": existing_patient.email,
-                        "phone": existing_patient.phone,
-                        "preferred_doctor": existing_patient.preferred_doctor,
-                        "department": existing_patient.department,
-                        "language": existing_patient.language,
-                        "last_visit": existing_patient.last_visit
-                    }
-                    print(f"=== [RETURNING CUSTOMER] Found: {existing_patient.name} ===")
-                else:
-                    print(f"=== [NEW CUSTOMER] Not found in database ===")
+        except Exception as e:
+            logger.warning("Database check failed: %s", e)
+            customer_type = "new"
 
-            except Exception as e:
-                print(f"=== [ERROR] Database check failed: {e} ===")
-                customer_type = "new"
+    # Prepare response based on customer type
+    if customer_type == "returning" and customer_info:
+        message = f"Welcome back {customer_info['name']}! I found your information in our system."
+        if customer_info.get('preferred_doctor'):
+            message += f" Would you like to book with Dr. {customer_info['preferred_doctor']} again?"
 
-        # Prepare response based on customer type
-        if customer_type == "returning" and customer_info:
-            message = f"Welcome back {customer_info['name']}! I found your information in our system."
-            if customer_info.get('preferred_doctor'):
-                message += f" Would you like to book with Dr. {customer_info['preferred_doctor']} again?"
+        return {
+            "success": True,
+            "customer_type": "returning",
+            "customer_info": customer_info,
+            "message": message,
+            "skip_email_collection": True,
+            "suggested_doctor": customer_info.get('preferred_doctor'),
+            "suggested_department": customer_info.get('department')
+        }
+    else:
+        return {
+            "success": True,
+            "customer_type": "new",
+            "customer_info": None,
+            "message": f"Thank you {patient_name}. I'll help you book your first appointment with us.",
+            "skip_email_collection": False
+        }
 
-            await params.result_callback({
-                "success": True,
-                "customer_type": "returning",
-                "customer_info": customer_info,
-                "message": message,
-                "skip_email_collection": True,
-                "suggested_doctor": customer_info.get('preferred_doctor'),
-                "suggested_department": customer_info.get('department')
-            })
-        else:
-            await params.result_callback({
-                "success": True,
-                "customer_type": "new",
-                "customer_info": None,
-                "message": f"Thank you {patient_name}. I'll help you book your first appointment with us.",
-                "skip_email_collection": False
-            })
+@safe_handler("preparing booking", "There was an error checking your details. Please try again.")
+async def handle_prepare_booking(params: FunctionCallParams):
+    """Handle customer detection and availability checking together"""
+    get = params.arguments.get
+    phone_number = get("phone_number")
+    patient_name = get("patient_name")
+    appointment_date = get("appointment_date")
+    appointment_time = get("appointment_time")
+    duration_minutes = get("duration_minutes", 30)
+
+    logger.debug("prepare_booking phone=%s name=%s date=%s time=%s duration=%s",
+                 phone_number, patient_name, appointment_date, appointment_time, duration_minutes)
+
+    # Sheets and Calendar lookups are independent - run them concurrently
+    customer, availability = await asyncio.gather(
+        _detect_customer(phone_number, patient_name),
+        _check_availability(appointment_date, appointment_time, duration_minutes),
+        return_exceptions=True
+    )
+    if isinstance(customer, Exception):
+        logger.error(f"Error detecting customer type: {customer}")
+        customer = {
+            "success": False,
+            "error": f"Error detecting customer type: {str(customer)}",
+            "message": "I'll help you as a new patient."
+        }
+    if isinstance(availability, Exception):
+        logger.error(f"Error checking availability: {availability}")
+        availability = {
+            "success": False,
+            "error": f"Error checking availability: {str(availability)}",
+            "message": "There was an error checking availability. Please try again."
+        }
 
-    except Exception as e:
-        error_msg = f"Error detecting customer type: {str(e)}"
-        print(f"=== [ERROR] {error_msg} ===")
-        logger.error(error_msg)
+    await params.result_callback({
+        "success": customer["success"] and availability["success"],
+        "customer": customer,
+        "availability": availability
+    })
+
+@safe_handler("finding available doctors", "I couldn't look up the doctor schedule right now. Please try again.")
+async def handle_find_available_doctors(params: FunctionCallParams):
+    """Handle looking up which doctors of a department are working at a given time"""
+    get = params.arguments.get
+    department = get("department", "")
+    appointment_date = get("appointment_date", "")
+    appointment_time = get("appointment_time", "")
+
+    logger.debug("find_available_doctors department=%s date=%s time=%s",
+                 department, appointment_date, appointment_time)
+
+    dept = department_id(department)
+    if dept is None:
         await params.result_callback({
             "success": False,
-            "error": error_msg,
-            "message": "I'll help you as a new patient."
+            "error": f"No doctor schedule for department: {department}",
+            "message": f"I can check doctor schedules for {', '.join(DEPARTMENTS)}."
         })
+        return
+
+    moment = parse_appointment_datetime(appointment_date, appointment_time)
+    if moment is None:
+        await params.result_callback({
+            "success": False,
+            "error": f"Could not parse date/time: {appointment_date} {appointment_time}",
+            "message": "Could you tell me the date and time again?"
+        })
+        return
+
+    doctors = available_doctors(dept, moment.weekday(), moment.hour)
+    await params.result_callback({
+        "success": True,
+        "department": DEPARTMENTS[dept],
+        "doctors": doctors,
+        "message": (f"{len(doctors)} {DEPARTMENTS[dept]} doctor(s) available at that time." if doctors
+                    else f"No {DEPARTMENTS[dept]} doctor is on shift at that time.")
+    })
 
 # Function registry for easy registration with LLM
 ENHANCED_FUNCTION_REGISTRY = {
+    "prepare_booking": handle_prepare_booking,
+    "find_available_doctors": handle_find_available_doctors,
     "detect_customer_type": handle_detect_customer_type,
     "check_appointment_availability": handle_check_appointment_availability,
     "book_appointment": handle_book_appointment,
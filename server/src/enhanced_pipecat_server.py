@@ -4,12 +4,20 @@ import asyncio
 import os
 import sys
 import json
+import atexit
+import logging
+import logging.handlers
+import queue
+import time
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
+from functools import lru_cache
+from datetime import date, datetime, timedelta
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket
+from fastapi.websockets import WebSocketState
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 import structlog
 
@@ -31,11 +39,42 @@ from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logger = structlog.get_logger(__name__)
+# Configure structured logging. Records are rendered on the calling thread and
+# handed to a queue; a listener thread does the (blocking) stdout writes.
+structlog.configure(
+    processors=[
+        structlog.stdlib.filter_by_level,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+        structlog.processors.UnicodeDecoder(),
+        structlog.stdlib.ProcessorFormatter.wrap_for_formatter
+    ],
+    context_class=dict,
+    logger_factory=structlog.stdlib.LoggerFactory(),
+    wrapper_class=structlog.stdlib.BoundLogger,
+    cache_logger_on_first_use=True,
+)
 
-# Global variables
-active_sessions = {}
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.handlers.QueueHandler(_log_queue)
+_log_handler.setFormatter(structlog.stdlib.ProcessorFormatter(
+    processor=structlog.processors.JSONRenderer(),
+    foreign_pre_chain=[
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso")
+    ]
+))
+logging.basicConfig(handlers=[_log_handler], level=os.getenv("LOG_LEVEL", "INFO").upper())
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logger = structlog.get_logger(__name__)
 
 # Import enhanced functionality
 from gmail_routes import router as gmail_router
@@ -45,12 +84,74 @@ from enhanced_appointment_functions import (
 )
 from call_logger import get_call_logger
 from language_support import get_language_manager
+from session_registry import get_session_registry
+
+# Global variables - sessions are shared across workers through Redis when REDIS_URL is set
+session_registry = get_session_registry()
+active_sessions = session_registry.local
+
+SUPPORTED_LANGUAGES = frozenset(("english", "hindi", "telugu"))
+
+# Sessions are ended once they run this long or their client has gone away
+MAX_SESSION_SECONDS = int(os.getenv("MAX_SESSION_SECONDS", "1800"))
+SESSION_REAP_INTERVAL = 60
+
+async def _session_reaper():
+    """Periodically end sessions that have disconnected or exceeded the maximum duration"""
+    while True:
+        await asyncio.sleep(SESSION_REAP_INTERVAL)
+        now = time.monotonic()
+        for session_id, session_info in list(active_sessions.items()):
+            age = now - session_info["start_mono"]
+            websocket = session_info.get("websocket")
+            disconnected = websocket is not None and WebSocketState.DISCONNECTED in (
+                websocket.client_state, websocket.application_state)
+            if age <= MAX_SESSION_SECONDS and not disconnected:
+                continue
+
+            logger.warning("session_reaped", session_id=session_id, age_seconds=age, disconnected=disconnected)
+            try:
+                await session_info["task"].cancel()
+            except Exception as e:
+                logger.warning("session_reap_failed", session_id=session_id, error=str(e))
+            await session_registry.remove(session_id)
+
+# /call-stats is served from memory and refreshed in the background
+CALL_STATS_TTL = 60
+_call_stats_cache = {"value": None, "ts": 0.0}
+
+async def _refresh_call_stats():
+    """Recompute the 30-day call statistics off the event loop"""
+    stats = await asyncio.to_thread(get_call_logger().get_call_stats, 30)
+    _call_stats_cache.update(value=stats, ts=time.monotonic())
+    return stats
+
+async def _call_stats_refresher():
+    """Keep the cached call statistics fresh"""
+    while True:
+        try:
+            await _refresh_call_stats()
+        except Exception as e:
+            logger.warning("call_stats_refresh_failed", error=str(e))
+        await asyncio.sleep(CALL_STATS_TTL)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("Starting Enhanced Pipecat server with multi-language support")
+    background_tasks = [
+        asyncio.create_task(_session_reaper()),
+        asyncio.create_task(_call_stats_refresher())
+    ]
     yield
+    for background_task in background_tasks:
+        background_task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    # Write out call records the function handlers have queued
+    call_logger = get_call_logger()
+    await call_logger.flush_async()
+    call_logger.flush()
     logger.info("Shutting down Enhanced Pipecat server")
 
 # Create FastAPI app
@@ -58,6 +159,7 @@ app = FastAPI(
     title="Enhanced Renova Hospitals Voice Agent",
     description="Multi-language voice agent with appointment booking, cancellation, and comprehensive call logging",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -73,16 +175,8 @@ app.add_middleware(
 # Include Gmail routes
 app.include_router(gmail_router, prefix="/gmail", tags=["gmail"])
 
-def get_enhanced_system_instruction(language: str = "english", voice_id: str = "Charon") -> str:
-    """Get enhanced system instructions with multi-language support"""
-
-    today = datetime.now()
-    tomorrow = today + timedelta(days=1)
-
-    lang_manager = get_language_manager()
-    lang_specific_instruction = lang_manager.get_system_instruction_for_language(language)
-
-    base_instruction = f"""
+# Enhanced system instruction; only the date, time, voice and language rules vary
+_ENHANCED_INSTRUCTION_TEMPLATE = """
 🏥 RENOVA HOSPITALS VOICE AGENT - ENHANCED VERSION 2.0
 
 You are an advanced voice assistant for Renova Hospitals with comprehensive capabilities.
@@ -94,9 +188,9 @@ You are an advanced voice assistant for Renova Hospitals with comprehensive capa
 4. ALWAYS use function calling for external actions
 
 === CURRENT CONTEXT ===
-Today's date: {today.strftime('%Y-%m-%d (%A)')}
-Tomorrow's date: {tomorrow.strftime('%Y-%m-%d (%A)')}
-Current time: {today.strftime('%H:%M')}
+Today's date: {today}
+Tomorrow's date: {tomorrow}
+Current time: {current_time}
 Voice: {voice_id} (24kHz natural audio)
 
 {lang_specific_instruction}
@@ -109,15 +203,19 @@ Voice: {voice_id} (24kHz natural audio)
 - Suggest nearby time slots and alternative dates
 
 📅 APPOINTMENT BOOKING WORKFLOW:
-1. Check availability first (required!)
-2. Collect: name (English), phone, email, date, time, doctor, department
-3. Verify customer type (new/existing)
+1. Once you have name, phone, date and time, call prepare_booking() - it checks customer type AND availability in one call (required!)
+2. Collect the rest: email (skip for returning customers), doctor, department
+3. Use check_appointment_availability() or detect_customer_type() alone only when just one of them is needed
 4. Call book_appointment() which handles:
    - Final availability check
    - Email confirmation
    - Calendar integration
    - Automatic call logging
 
+👩‍⚕️ DOCTOR SCHEDULES:
+- Call find_available_doctors() to see which Cardiology, Orthopedic or Dermatology doctors are on shift at a time
+- Offer only doctors it returns, with their consultation fee if asked
+
 ❌ APPOINTMENT CANCELLATION:
 - Verify ALL details: name, doctor, date, time
 - Call cancel_appointment() for verification
@@ -138,6 +236,26 @@ Voice: {voice_id} (24kHz natural audio)
 
 === FUNCTION CALLING REQUIREMENTS ===
 
+FOR CUSTOMER + AVAILABILITY CHECK (preferred before booking):
+```
+prepare_booking(
+    phone_number="+91-9876543210",
+    patient_name="John Smith",
+    appointment_date="YYYY-MM-DD",
+    appointment_time="HH:MM AM/PM",
+    duration_minutes=30
+)
+```
+
+FOR DOCTOR SCHEDULES:
+```
+find_available_doctors(
+    department="Cardiology|Orthopedic|Dermatology",
+    appointment_date="YYYY-MM-DD",
+    appointment_time="HH:MM AM/PM"
+)
+```
+
 FOR AVAILABILITY CHECKS:
 ```
 check_appointment_availability(
@@ -195,7 +313,7 @@ log_call_information(
 
 🎯 APPOINTMENT BOOKING:
 1. "Let me check availability for that time slot..."
-2. Call check_appointment_availability()
+2. Call prepare_booking() (or check_appointment_availability() if customer type is already known)
 3. If available: "Great! That slot is free. Let me book it for you."
 4. If unavailable: "Sorry, that slot is busy. Here are alternatives: [list options]"
 5. Collect all required details
@@ -235,10 +353,49 @@ log_call_information(
 6. ALWAYS be respectful and professional
 
 Remember: You're representing Renova Hospitals' commitment to excellent patient care through advanced technology.
-"""
+""".format
 
-    return base_instruction
+def get_enhanced_system_instruction(language: str = "english", voice_id: str = "Charon") -> str:
+    """Get enhanced system instructions with multi-language support"""
+    # The prompt only shows the time to the minute, so it's reused within a minute
+    return _build_enhanced_system_instruction(language, voice_id, datetime.now().replace(second=0, microsecond=0))
+
+@lru_cache(maxsize=2)
+def _date_strings(ordinal: int) -> tuple[str, str]:
+    """Today's and tomorrow's dates as shown in the prompt, for a date ordinal"""
+    today = date.fromordinal(ordinal)
+    return today.strftime('%Y-%m-%d (%A)'), (today + timedelta(days=1)).strftime('%Y-%m-%d (%A)')
+
+@lru_cache(maxsize=32)
+def _build_enhanced_system_instruction(language: str, voice_id: str, today: datetime) -> str:
+    """Build the system instruction for a language, voice and (minute-resolution) time"""
+    today_str, tomorrow_str = _date_strings(today.toordinal())
+
+    lang_manager = get_language_manager()
+    lang_specific_instruction = lang_manager.get_system_instruction_for_language(language)
 
+    return _ENHANCED_INSTRUCTION_TEMPLATE(
+        today=today_str,
+        tomorrow=tomorrow_str,
+        current_time=today.strftime('%H:%M'),
+        voice_id=voice_id,
+        lang_specific_instruction=lang_specific_instruction
+    )
+
+
+# Gemini Live settings shared by every session; only the voice and instruction vary.
+# Service instances hold per-call state (context, live connection), so each session
+# still creates its own.
+_LLM_SERVICE_PARAMS = {
+    "api_key": os.getenv("GEMINI_API_KEY"),
+    "audio_out_sample_rate": 24000,  # Critical for natural voice
+    "audio_in_sample_rate": 16000,
+    "tools": enhanced_appointment_tools  # Enhanced tools with all new functions
+}
+
+# Function handlers registered on every session's LLM service
+_REGISTERED_FUNCS = tuple(ENHANCED_FUNCTION_REGISTRY.items())
+_REGISTERED_FUNC_NAMES = [func_name for func_name, _ in _REGISTERED_FUNCS]
 
 async def create_voice_session(websocket: WebSocket, voice_id: str = "Charon", language: str = "english"):
     """Create enhanced voice session with all new features"""
@@ -253,18 +410,15 @@ async def create_voice_session(websocket: WebSocket, voice_id: str = "Charon", l
 
         # Create Gemini Live LLM service with enhanced tools
         llm = GeminiMultimodalLiveLLMService(
-            api_key=os.getenv("GEMINI_API_KEY"),
             voice_id=voice_id,
-            audio_out_sample_rate=24000,  # Critical for natural voice
-            audio_in_sample_rate=16000,
-            tools=enhanced_appointment_tools,  # Enhanced tools with all new functions
-            system_instruction=system_instruction
+            system_instruction=system_instruction,
+            **_LLM_SERVICE_PARAMS
         )
 
         # Register ALL enhanced functions
-        for func_name, func_handler in ENHANCED_FUNCTION_REGISTRY.items():
+        for func_name, func_handler in _REGISTERED_FUNCS:
             llm.register_function(func_name, func_handler)
-            logger.info(f"Registered enhanced function: {func_name}")
+        logger.debug("functions_registered", functions=_REGISTERED_FUNC_NAMES)
 
         # Create context for function calling (CRITICAL!)
         context = OpenAILLMContext(tools=enhanced_appointment_tools)
@@ -298,8 +452,7 @@ async def create_voice_session(websocket: WebSocket, voice_id: str = "Charon", l
 
         # Start with greeting that includes language detection
         greeting_text = lang_manager.get_text("greeting", language)
-        logger.info(f"Starting session with voice: {voice_id}, language: {language}")
-        logger.info(f"Greeting: {greeting_text}")
+        logger.info("session_starting", voice_id=voice_id, language=language, greeting=greeting_text)
 
         # Queue initial greeting
         await task.queue_frames([LLMRunFrame()])
@@ -307,16 +460,18 @@ async def create_voice_session(websocket: WebSocket, voice_id: str = "Charon", l
         # Create session info
         session_info = {
             "task": task,
+            "websocket": websocket,
             "language": language,
             "voice_id": voice_id,
             "start_time": datetime.now(),
+            "start_mono": time.monotonic(),
             "call_logger": get_call_logger()
         }
 
         return session_info
 
     except Exception as e:
-        logger.error(f"Failed to create voice session: {e}")
+        logger.error("session_create_failed", error=str(e))
         raise
 
 @app.websocket("/ws")
@@ -324,7 +479,6 @@ async def websocket_endpoint(websocket: WebSocket):
     """Enhanced WebSocket endpoint with multi-language support"""
 
     await websocket.accept()
-    logger.info("Enhanced WebSocket connection established")
 
     # Get voice and language from query parameters
     query_params = websocket.query_params
@@ -333,40 +487,39 @@ async def websocket_endpoint(websocket: WebSocket):
     session_id = query_params.get("session_id", "default")
 
     # Validate language
-    if language not in ["english", "hindi", "telugu"]:
+    if language not in SUPPORTED_LANGUAGES:
         language = "english"
 
-    logger.info(f"Creating enhanced session - Voice: {voice_id}, Language: {language}, Session: {session_id}")
+    log = logger.bind(session_id=session_id)
+    log.info("websocket_connected", voice_id=voice_id, language=language)
 
+    session_info = None
     try:
         # Create enhanced voice session
         session_info = await create_voice_session(websocket, voice_id, language)
-        active_sessions[session_id] = session_info
+        await session_registry.add(session_id, session_info)
 
         # Run the session
         runner = PipelineRunner(handle_sigint=False)
         await runner.run(session_info["task"])
 
     except Exception as e:
-        logger.error(f"Enhanced WebSocket session error: {e}")
+        log.error("session_error", error=str(e))
         await websocket.close(code=1011, reason="Internal server error")
     finally:
-        # Cleanup
-        if session_id in active_sessions:
-            session_info = active_sessions[session_id]
-
+        # Cleanup (the reaper may already have unregistered a stale session)
+        await session_registry.remove(session_id)
+        if session_info:
             # Log session end
             call_logger = session_info.get("call_logger")
             if call_logger:
                 try:
-                    duration = (datetime.now() - session_info["start_time"]).total_seconds()
-                    logger.info(f"Session ended - Duration: {duration}s, Language: {session_info['language']}")
+                    duration = time.monotonic() - session_info["start_mono"]
+                    log.info("session_ended", duration_seconds=duration, language=session_info['language'])
                 except Exception as e:
-                    logger.warning(f"Failed to log session end: {e}")
-
-            del active_sessions[session_id]
+                    log.warning("session_end_log_failed", error=str(e))
 
-        logger.info(f"Enhanced WebSocket connection closed for session: {session_id}")
+        log.info("websocket_closed")
 
 @app.get("/health")
 async def health_check():
@@ -382,26 +535,29 @@ async def health_check():
             "email_integration": True,
             "calendar_integration": True
         },
-        "active_sessions": len(active_sessions),
+        "active_sessions": await session_registry.count(),
         "supported_languages": ["english", "hindi", "telugu"],
         "supported_voices": ["Puck", "Charon", "Kore", "Fenrir"],
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now()
     }
 
 @app.get("/sessions")
 async def get_active_sessions():
     """Get information about active sessions"""
+    sessions = await session_registry.list_sessions()
+    now = datetime.now()
     session_info = {}
-    for session_id, session in active_sessions.items():
+    for session_id, session in sessions.items():
+        start_time = session.get("start_time", now)
         session_info[session_id] = {
             "language": session.get("language", "unknown"),
             "voice_id": session.get("voice_id", "unknown"),
-            "start_time": session.get("start_time", "unknown"),
-            "duration_seconds": (datetime.now() - session.get("start_time", datetime.now())).total_seconds()
+            "start_time": start_time,
+            "duration_seconds": (now - start_time).total_seconds()
         }
 
     return {
-        "active_sessions": len(active_sessions),
+        "active_sessions": len(sessions),
         "sessions": session_info
     }
 
@@ -409,15 +565,16 @@ async def get_active_sessions():
 async def get_call_statistics():
     """Get call statistics from the logger"""
     try:
-        call_logger = get_call_logger()
-        stats = call_logger.get_call_stats(days=30)
+        stats = _call_stats_cache["value"]
+        if stats is None or time.monotonic() - _call_stats_cache["ts"] >= CALL_STATS_TTL:
+            stats = await _refresh_call_stats()
         return {
             "success": True,
             "stats": stats,
             "period": "last_30_days"
         }
     except Exception as e:
-        logger.error(f"Failed to get call stats: {e}")
+        logger.error("call_stats_failed", error=str(e))
         return {
             "success": False,
             "error": str(e)
@@ -431,6 +588,8 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8090, help="Port to bind to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Number of worker processes (set REDIS_URL to share sessions between them)")
 
     args = parser.parse_args()
 
@@ -448,5 +607,12 @@ if __name__ == "__main__":
         host=args.host,
         port=args.port,
         reload=args.reload,
-        log_level="info"
+        workers=None if args.reload else args.workers,
+        log_level="info",
+        # uvloop event loop and httptools parser (uvloop isn't available on Windows)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False,  # Audio frames don't compress; skip zlib on every send
+        lifespan="on"
     )
\ No newline at end of file
@@ -173,11 +173,7 @@ If email sending fails:
 
 [Doctor Schedules & Availability]
 
-Cardiology Department Coverage: Dr. Rajesh Kumar takes Sundays off with Dr. Priya Sharma covering general cardiology cases. Dr. Priya Sharma is unavailable on Mondays when Dr. Amit Patel handles cardiac surgery cases. Dr. Amit Patel takes Tuesdays off with Dr. Sunita Reddy covering pediatric cardiology. Dr. Sunita Reddy is off on Wednesdays when Dr. Vikram Singh handles electrophysiology cases. Dr. Vikram Singh takes Thursdays off with Dr. Rajesh Kumar providing general cardiology coverage.
-
-Orthopedic Department Coverage: Dr. Arjun Mehta takes Fridays off with Dr. Kavya Nair providing general orthopedic coverage. Dr. Kavya Nair is unavailable on Saturdays when Dr. Rohit Gupta handles sports medicine cases. Dr. Rohit Gupta takes Sundays off with Dr. Meera Joshi covering trauma surgery. Dr. Meera Joshi is off on Mondays when Dr. Deepak Sharma handles pediatric orthopedics. Dr. Deepak Sharma takes Tuesdays off with Dr. Arjun Mehta covering joint replacement cases.
-
-Dermatology Department Coverage: Dr. Neha Agarwal takes Wednesdays off with Dr. Ravi Krishnan providing general dermatology coverage. Dr. Ravi Krishnan is unavailable on Thursdays when Dr. Sanjay Iyer handles pediatric dermatology. Dr. Sanjay Iyer takes Fridays off with Dr. Priyanka Jain covering cosmetic dermatology. Dr. Priyanka Jain is off on Saturdays when Dr. Manish Gupta handles dermatopathology cases. Dr. Manish Gupta takes Sundays off with Dr. Neha Agarwal providing acne and skin treatment coverage.
+Cardiology, Orthopedic and Dermatology: each doctor's off-day cover is listed with their entry in the Department Directory below.
 
 Neurology Department Coverage: Dr. Ashok Bansal takes Mondays off with Dr. Lakshmi Venkat providing general neurology coverage. Dr. Lakshmi Venkat is unavailable on Tuesdays when Dr. Suresh Pillai handles stroke cases. Dr. Suresh Pillai takes Wednesdays off with Dr. Anita Desai covering epilepsy emergencies. Dr. Anita Desai is off on Thursdays when Dr. Karthik Murthy handles movement disorder cases. Dr. Karthik Murthy takes Fridays off with Dr. Ashok Bansal providing headache specialist coverage.
 
@@ -249,15 +245,15 @@ Specialties: Heart disease, cardiac surgery, interventional cardiology, electrop
 
 Medical Staff:
 
-Dr. Rajesh Kumar (Senior Cardiologist) - Morning Shift (6 AM - 2 PM) - Consultation: ₹1,500 - Off: Sundays
+Dr. Rajesh Kumar (Senior Cardiologist) - Morning Shift (6 AM - 2 PM) - Consultation: ₹1,500 - Off: Sundays (covered by Dr. Priya Sharma)
 
-Dr. Priya Sharma (Interventional Cardiologist) - Afternoon Shift (2 PM - 10 PM) - Consultation: ₹2,000 - Off: Mondays
+Dr. Priya Sharma (Interventional Cardiologist) - Afternoon Shift (2 PM - 10 PM) - Consultation: ₹2,000 - Off: Mondays (covered by Dr. Amit Patel)
 
-Dr. Amit Patel (Cardiac Surgeon) - Night Shift (10 PM - 6 AM) - Consultation: ₹2,500 - Off: Tuesdays
+Dr. Amit Patel (Cardiac Surgeon) - Night Shift (10 PM - 6 AM) - Consultation: ₹2,500 - Off: Tuesdays (covered by Dr. Sunita Reddy)
 
-Dr. Sunita Reddy (Pediatric Cardiologist) - Morning Shift (8 AM - 4 PM) - Consultation: ₹1,800 - Off: Wednesdays
+Dr. Sunita Reddy (Pediatric Cardiologist) - Morning Shift (8 AM - 4 PM) - Consultation: ₹1,800 - Off: Wednesdays (covered by Dr. Vikram Singh)
 
-Dr. Vikram Singh (Electrophysiologist) - Evening Shift (4 PM - 12 AM) - Consultation: ₹2,200 - Off: Thursdays
+Dr. Vikram Singh (Electrophysiologist) - Evening Shift (4 PM - 12 AM) - Consultation: ₹2,200 - Off: Thursdays (covered by Dr. Rajesh Kumar)
 
 Emergency Coverage: Available 24x7 - Emergency Consultation: ₹3,000 OPD Timings: 9 AM - 6 PM (Mon-Sat) Department Consultation Range: ₹1,500 - ₹2,500
 
@@ -267,15 +263,15 @@ Specialties: Joint replacement, spine surgery, sports medicine, trauma surgery,
 
 Medical Staff:
 
-Dr. Arjun Mehta (Joint Replacement Specialist) - Morning Shift (7 AM - 3 PM) - Consultation: ₹1,800 - Off: Fridays
+Dr. Arjun Mehta (Joint Replacement Specialist) - Morning Shift (7 AM - 3 PM) - Consultation: ₹1,800 - Off: Fridays (covered by Dr. Kavya Nair)
 
-Dr. Kavya Nair (Spine Surgeon) - Afternoon Shift (3 PM - 11 PM) - Consultation: ₹1,600 - Off: Saturdays
+Dr. Kavya Nair (Spine Surgeon) - Afternoon Shift (3 PM - 11 PM) - Consultation: ₹1,600 - Off: Saturdays (covered by Dr. Rohit Gupta)
 
-Dr. Rohit Gupta (Sports Medicine) - Morning Shift (6 AM - 2 PM) - Consultation: ₹1,000 - Off: Sundays
+Dr. Rohit Gupta (Sports Medicine) - Morning Shift (6 AM - 2 PM) - Consultation: ₹1,000 - Off: Sundays (covered by Dr. Meera Joshi)
 
-Dr. Meera Joshi (Trauma Surgeon) - Night Shift (11 PM - 7 AM) - Consultation: ₹1,400 - Off: Mondays
+Dr. Meera Joshi (Trauma Surgeon) - Night Shift (11 PM - 7 AM) - Consultation: ₹1,400 - Off: Mondays (covered by Dr. Deepak Sharma)
 
-Dr. Deepak Sharma (Pediatric Orthopedics) - Afternoon Shift (1 PM - 9 PM) - Consultation: ₹1,200 - Off: Tuesdays
+Dr. Deepak Sharma (Pediatric Orthopedics) - Afternoon Shift (1 PM - 9 PM) - Consultation: ₹1,200 - Off: Tuesdays (covered by Dr. Arjun Mehta)
 
 Emergency Coverage: Available 24x7 - Emergency Consultation: ₹2,000 OPD Timings: 8 AM - 5 PM (Mon-Sat) Department Consultation Range: ₹1,000 - ₹1,800
 
@@ -285,15 +281,15 @@ Specialties: General dermatology, cosmetic procedures, pediatric dermatology, de
 
 Medical Staff:
 
-Dr. Neha Agarwal (General Dermatologist) - Morning Shift (8 AM - 4 PM) - Consultation: ₹800 - Off: Wednesdays
+Dr. Neha Agarwal (General Dermatologist) - Morning Shift (8 AM - 4 PM) - Consultation: ₹800 - Off: Wednesdays (covered by Dr. Ravi Krishnan)
 
-Dr. Ravi Krishnan (Cosmetic Dermatologist) - Afternoon Shift (2 PM - 10 PM) - Consultation: ₹1,200 - Off: Thursdays
+Dr. Ravi Krishnan (Cosmetic Dermatologist) - Afternoon Shift (2 PM - 10 PM) - Consultation: ₹1,200 - Off: Thursdays (covered by Dr. Sanjay Iyer)
 
-Dr. Sanjay Iyer (Pediatric Dermatologist) - Morning Shift (9 AM - 5 PM) - Consultation: ₹900 - Off: Fridays
+Dr. Sanjay Iyer (Pediatric Dermatologist) - Morning Shift (9 AM - 5 PM) - Consultation: ₹900 - Off: Fridays (covered by Dr. Priyanka Jain)
 
-Dr. Priyanka Jain (Aesthetic Dermatologist) - Evening Shift (4 PM - 12 AM) - Consultation: ₹1,100 - Off: Saturdays
+Dr. Priyanka Jain (Aesthetic Dermatologist) - Evening Shift (4 PM - 12 AM) - Consultation: ₹1,100 - Off: Saturdays (covered by Dr. Manish Gupta)
 
-Dr. Manish Gupta (Dermatopathologist) - Morning Shift (7 AM - 3 PM) - Consultation: ₹1,000 - Off: Sundays
+Dr. Manish Gupta (Dermatopathologist) - Morning Shift (7 AM - 3 PM) - Consultation: ₹1,000 - Off: Sundays (covered by Dr. Neha Agarwal)
 
 Emergency Coverage: Available 24x7 - Emergency Consultation: ₹1,500 OPD Timings: 9 AM - 6 PM (Mon-Sat) Department Consultation Range: ₹800 - ₹1,200
 
@@ -324,4 +320,11 @@ Emergency Triage Protocol
 All life-threatening conditions including severe chest pain, difficulty breathing, major trauma, stroke symptoms, severe bleeding, loss of consciousness, or any condition requiring immediate medical attention should be immediately directed to the Emergency Department regardless of the specific specialty needed. The emergency team will coordinate with the appropriate specialists and ensure the patient receives immediate care while specialist consultation is arranged.
 
 For non-emergency cases during regular hours, patients should be scheduled with the appropriate specialist based on their primary concern. During off-hours or when the primary specialist is unavailable, backup coverage ensures continuity of care, though emergency consultation rates may apply for urgent non-emergency cases.
-"""
\ No newline at end of file
+"""
+
+# The instruction split around its {{now}} placeholder, so rendering is one concatenation
+_INSTRUCTION_PREFIX, _INSTRUCTION_SUFFIX = ENHANCED_SYSTEM_INSTRUCTION.split("{{now}}", 1)
+
+def render_system_instruction(now: str) -> str:
+    """Fill the current date and time into the system instruction"""
+    return _INSTRUCTION_PREFIX + now + _INSTRUCTION_SUFFIX
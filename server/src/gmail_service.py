@@ -1,6 +1,10 @@
 import os
 import base64
+import asyncio
+import functools
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -11,11 +15,17 @@ from dataclasses import dataclass
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from googel_auth_manger import get_credentials
+from googel_auth_manger import get_credentials, authorized_request_builder
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Worker threads for the async API; sends are also capped by the callers'
+# per-user quota limiter, so a small pool is enough
+_GMAIL_IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gmail-io")
+
+_EMAIL_FORMAT_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 @dataclass
 class EmailAttachment:
     """Represents an email attachment"""
@@ -47,7 +57,9 @@ class GmailService:
         """Initialize the Gmail API service with authentication"""
         try:
             creds = self.credentials if self.credentials else get_credentials()
-            self.service = build('gmail', 'v1', credentials=creds)
+            self.credentials = creds
+            self.service = build('gmail', 'v1', credentials=creds,
+                                 requestBuilder=authorized_request_builder(creds), cache_discovery=False)
 
             # Get user profile to retrieve email address
             profile = self.service.users().getProfile(userId='me').execute()
@@ -59,6 +71,11 @@ class GmailService:
             logger.error(f"Failed to initialize Gmail service: {str(e)}")
             raise
 
+    async def send_simple_email_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async variant of send_simple_email"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_GMAIL_IO_POOL, functools.partial(self.send_simple_email, *args, **kwargs))
+
     def create_message(self, email_msg: EmailMessage) -> Dict[str, Any]:
         """Create a message for the Gmail API"""
         try:
@@ -193,9 +210,7 @@ class GmailService:
 
     def validate_email_format(self, email: str) -> bool:
         """Basic email format validation"""
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return _EMAIL_FORMAT_RE.match(email) is not None
 
 # Global Gmail service instance
 _gmail_service = None
@@ -1,9 +1,13 @@
 import os
 import pickle
+import threading
 from pathlib import Path
+import httplib2
+import google_auth_httplib2
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
+from googleapiclient.http import HttpRequest
 
 # Scopes define the permissions your app requests.
 # Gmail scopes for appointment confirmation emails
@@ -29,6 +33,24 @@ CLIENT_SECRETS_FILE = os.getenv(
 )
 TOKEN_PICKLE_FILE = str(SERVER_DIR / "google_token.pickle")
 
+# One httplib2 connection pool per thread, shared by every Google service
+_thread_state = threading.local()
+
+def authorized_request_builder(credentials):
+    """
+    Returns a requestBuilder for googleapiclient's build().
+    httplib2.Http is not thread-safe, so each request runs on the calling
+    thread's own Http; Gmail, Calendar and Sheets calls made from the same
+    worker thread then reuse its open connections instead of handshaking again.
+    """
+    def build_request(http, *args, **kwargs):
+        thread_http = getattr(_thread_state, 'http', None)
+        if thread_http is None:
+            thread_http = _thread_state.http = httplib2.Http()
+        transport = google_auth_httplib2.AuthorizedHttp(credentials, http=thread_http)
+        return HttpRequest(transport, *args, **kwargs)
+    return build_request
+
 def get_credentials():
     """
     Handles the authentication flow.
@@ -58,14 +58,19 @@ class GoogleSheetsService:
     def _initialize_services(self):
         """Initialize Google Drive and Sheets services"""
         try:
+            from googel_auth_manger import authorized_request_builder
             if self.credentials:
                 creds = self.credentials
             else:
                 from googel_auth_manger import get_credentials
                 creds = get_credentials()
 
-            self.drive_service = build('drive', 'v3', credentials=creds)
-            self.sheets_service = build('sheets', 'v4', credentials=creds)
+            # Lookups run on worker threads; give each thread its own transport
+            request_builder = authorized_request_builder(creds)
+            self.drive_service = build('drive', 'v3', credentials=creds,
+                                       requestBuilder=request_builder, cache_discovery=False)
+            self.sheets_service = build('sheets', 'v4', credentials=creds,
+                                        requestBuilder=request_builder, cache_discovery=False)
 
             logger.info("Google Drive and Sheets services initialized successfully")
 
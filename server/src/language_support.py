@@ -84,6 +84,41 @@ LANGUAGE_TEMPLATES = {
     }
 }
 
+# Appointment confirmation and alternative-slot intro per language
+CONFIRMATION_TEMPLATES = {
+    SupportedLanguage.ENGLISH.value: "Your appointment is confirmed:\nPatient: {patient_name}\nDoctor: {doctor_name}\nDate: {date}\nTime: {time}\nYou will receive an email confirmation.",
+    SupportedLanguage.HINDI.value: "आपका अपॉइंटमेंट बुक हो गया है:\nमरीज़: {patient_name}\nडॉक्टर: {doctor_name}\nतारीख: {date}\nसमय: {time}\nआपको ईमेल कन्फर्मेशन मिलेगा।",
+    SupportedLanguage.TELUGU.value: "మీ అపాయింట్‌మెంట్ బుక్ చేయబడింది:\nపేషెంట్: {patient_name}\nడాక్టర్: {doctor_name}\nతేదీ: {date}\nసమయం: {time}\nమీకు ఇమెయిల్ కన్ఫర్మేషన్ వస్తుంది।"
+}
+
+ALTERNATIVES_INTRO = {
+    SupportedLanguage.ENGLISH.value: "Here are some alternative times:",
+    SupportedLanguage.HINDI.value: "यहां कुछ वैकल्पिक समय हैं:",
+    SupportedLanguage.TELUGU.value: "ఇక్కడ కొన్ని ప్రత్యామ్నాయ సమయాలు ఉన్నాయి:"
+}
+
+class LanguageFormatter:
+    """Response formatting bound to one language's templates"""
+
+    def __init__(self, language: str):
+        self.language = language
+        self._confirmation = CONFIRMATION_TEMPLATES[language].format
+        self._alternatives_intro = ALTERNATIVES_INTRO[language]
+        self._no_alternatives = LANGUAGE_TEMPLATES[language]["error"]
+
+    def appointment_confirmation(self, patient_name: str, doctor_name: str, date: str, time: str) -> str:
+        """Format appointment confirmation"""
+        return self._confirmation(patient_name=patient_name, doctor_name=doctor_name, date=date, time=time)
+
+    def alternative_slots(self, alternatives: list) -> str:
+        """Format alternative time slots"""
+        if not alternatives:
+            return self._no_alternatives
+
+        formatted_alternatives = [alt.get('formatted', f"{alt['date']} at {alt['time']}") for alt in alternatives]
+        alternatives_text = "\n".join([f"• {alt}" for alt in formatted_alternatives])
+        return f"{self._alternatives_intro}\n{alternatives_text}"
+
 class LanguageManager:
     """Manages multi-language support for the voice agent"""
 
@@ -91,6 +126,7 @@ class LanguageManager:
         """Initialize the language manager"""
         self.current_language = SupportedLanguage.ENGLISH.value
         self.templates = LANGUAGE_TEMPLATES
+        self.formatters = {lang.value: LanguageFormatter(lang.value) for lang in SupportedLanguage}
 
     def set_language(self, language: str) -> bool:
         """Set the current language"""
@@ -189,41 +225,19 @@ TELUGU SPECIFIC:
         else:
             return base_instruction
 
+    def formatter_for(self, language: str = None) -> LanguageFormatter:
+        """Get the formatter for a language, falling back to English"""
+        lang = language or self.current_language
+        return self.formatters.get(lang) or self.formatters[SupportedLanguage.ENGLISH.value]
+
     def format_appointment_confirmation(self, patient_name: str, doctor_name: str,
                                       date: str, time: str, language: str = None) -> str:
         """Format appointment confirmation in the specified language"""
-        lang = language or self.current_language
-
-        if lang == SupportedLanguage.HINDI.value:
-            return f"आपका अपॉइंटमेंट बुक हो गया है:\nमरीज़: {patient_name}\nडॉक्टर: {doctor_name}\nतारीख: {date}\nसमय: {time}\nआपको ईमेल कन्फर्मेशन मिलेगा।"
-        elif lang == SupportedLanguage.TELUGU.value:
-            return f"మీ అపాయింట్‌మెంట్ బుక్ చేయబడింది:\nపేషెంట్: {patient_name}\nడాక్టర్: {doctor_name}\nతేదీ: {date}\nసమయం: {time}\nమీకు ఇమెయిల్ కన్ఫర్మేషన్ వస్తుంది।"
-        else:
-            return f"Your appointment is confirmed:\nPatient: {patient_name}\nDoctor: {doctor_name}\nDate: {date}\nTime: {time}\nYou will receive an email confirmation."
+        return self.formatter_for(language).appointment_confirmation(patient_name, doctor_name, date, time)
 
     def format_alternative_slots(self, alternatives: list, language: str = None) -> str:
         """Format alternative time slots in the specified language"""
-        lang = language or self.current_language
-
-        if not alternatives:
-            return self.get_text("error", lang)
-
-        formatted_alternatives = []
-        for alt in alternatives:
-            formatted_alternatives.append(alt.get('formatted', f"{alt['date']} at {alt['time']}"))
-
-        if lang == SupportedLanguage.HINDI.value:
-            intro = "यहां कुछ वैकल्पिक समय हैं:"
-            alternatives_text = "\n".join([f"• {alt}" for alt in formatted_alternatives])
-            return f"{intro}\n{alternatives_text}"
-        elif lang == SupportedLanguage.TELUGU.value:
-            intro = "ఇక్కడ కొన్ని ప్రత్యామ్నాయ సమయాలు ఉన్నాయి:"
-            alternatives_text = "\n".join([f"• {alt}" for alt in formatted_alternatives])
-            return f"{intro}\n{alternatives_text}"
-        else:
-            intro = "Here are some alternative times:"
-            alternatives_text = "\n".join([f"• {alt}" for alt in formatted_alternatives])
-            return f"{intro}\n{alternatives_text}"
+        return self.formatter_for(language).alternative_slots(alternatives)
 
 # Global language manager instance
 _language_manager = None
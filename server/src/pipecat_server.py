@@ -39,8 +39,8 @@ from gmail_routes import router as gmail_router
 from enhanced_appointment_functions import enhanced_appointment_tools, ENHANCED_FUNCTION_REGISTRY
 
 # Import call logging and patient storage
-from call_logger import CallLogger, CallRecord
-from google_sheets_service import GoogleSheetsService, PatientRecord, CallLogRecord
+from call_logger import get_call_logger, CallRecord
+from google_sheets_service import PatientRecord, CallLogRecord, get_sheets_service
 import uuid
 
 # Global variables
@@ -49,7 +49,7 @@ session_call_records = {}  # Store call records by session ID
 patient_database = {}  # Simple in-memory patient database {phone: patient_info}
 
 # Initialize call logger
-call_logger = CallLogger()
+call_logger = get_call_logger()  # shared with the appointment handlers: one writer per process
 
 # Helper function to update call record during conversations
 def update_call_record(session_id: str, **kwargs):
@@ -72,7 +72,7 @@ try:
 
     # Initialize Google Sheets service with the same credentials
     logger.info("Initializing Google Sheets service...")
-    global_sheets_service = GoogleSheetsService(global_google_credentials)
+    global_sheets_service = get_sheets_service(global_google_credentials)
     logger.info("SUCCESS: Google Sheets service initialized successfully")
 except Exception as e:
     logger.error(f"ERROR: Failed to initialize Google services: {e}")
@@ -5,6 +5,7 @@ import os
 import sys
 import json
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket
@@ -36,7 +37,7 @@ active_sessions = {}
 
 # Import Gmail routes
 from gmail_routes import router as gmail_router
-from enhanced_system_prompt import ENHANCED_SYSTEM_INSTRUCTION
+from enhanced_system_prompt import render_system_instruction
 from appointment_email_handler import get_appointment_email_handler
 
 @asynccontextmanager
@@ -92,7 +93,7 @@ async def run_bot(websocket: WebSocket, session_id: str, voice_id: str = "Charon
             voice_id=voice_id,  # Configurable voice: Puck, Charon, Kore, Fenrir
             model="models/gemini-2.0-flash-exp",  # Use latest model
             # Enhanced system instruction with appointment email functionality
-            system_instruction=ENHANCED_SYSTEM_INSTRUCTION
+            system_instruction=render_system_instruction(datetime.now().strftime("%Y-%m-%d %H:%M (%A)"))
         )
 
         # Create pipeline using RECOMMENDED PATTERN for Gemini Live
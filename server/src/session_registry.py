@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_SESSION_KEY_PREFIX = "voice_agent:session:"
+_SESSION_INDEX_KEY = "voice_agent:sessions"  # Sorted set: session_id -> expiry timestamp
+_SESSION_TTL = 6 * 3600  # Expire entries left behind by a worker that died mid-call
+
+class SessionRegistry:
+    """Active voice sessions across all server workers.
+
+    Pipeline objects (task, call logger) only live in the worker that owns the
+    WebSocket; when REDIS_URL is set, each session's metadata is also published
+    to Redis so every worker can report all sessions.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        """Initialize the registry, connecting to Redis if a URL is given"""
+        self.local: Dict[str, Dict[str, Any]] = {}
+        self._redis = None
+
+        if redis_url:
+            if redis is None:
+                logger.warning("REDIS_URL is set but the redis package is not installed; sessions are tracked per worker")
+            else:
+                self._redis = redis.from_url(redis_url, decode_responses=True)
+                logger.info("Session registry using Redis")
+
+    async def add(self, session_id: str, session_info: Dict[str, Any]):
+        """Register a session owned by this worker"""
+        self.local[session_id] = session_info
+
+        if self._redis:
+            try:
+                key = _SESSION_KEY_PREFIX + session_id
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.hset(key, mapping={
+                        "language": session_info.get("language", "unknown"),
+                        "voice_id": session_info.get("voice_id", "unknown"),
+                        "start_time": session_info["start_time"].isoformat(),
+                        "worker_pid": os.getpid()
+                    })
+                    pipe.expire(key, _SESSION_TTL)
+                    pipe.zadd(_SESSION_INDEX_KEY, {session_id: time.time() + _SESSION_TTL})
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to publish session {session_id}: {e}")
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session owned by this worker"""
+        return self.local.get(session_id)
+
+    async def remove(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Unregister a session, returning its local info if this worker owned it"""
+        session_info = self.local.pop(session_id, None)
+
+        if self._redis:
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.delete(_SESSION_KEY_PREFIX + session_id)
+                    pipe.zrem(_SESSION_INDEX_KEY, session_id)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to unpublish session {session_id}: {e}")
+
+        return session_info
+
+    async def list_sessions(self) -> Dict[str, Dict[str, Any]]:
+        """Get metadata for every active session, from all workers when Redis is available"""
+        if self._redis:
+            try:
+                session_ids = await self._redis.zrangebyscore(_SESSION_INDEX_KEY, time.time(), "+inf")
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for session_id in session_ids:
+                        pipe.hgetall(_SESSION_KEY_PREFIX + session_id)
+                    values = await pipe.execute()
+
+                sessions = {}
+                for session_id, session in zip(session_ids, values):
+                    if session:
+                        session["start_time"] = datetime.fromisoformat(session["start_time"])
+                        sessions[session_id] = session
+                return sessions
+            except Exception as e:
+                logger.warning(f"Failed to read sessions from Redis, reporting this worker only: {e}")
+
+        return {
+            session_id: {
+                "language": session.get("language", "unknown"),
+                "voice_id": session.get("voice_id", "unknown"),
+                "start_time": session.get("start_time", datetime.now())
+            }
+            for session_id, session in self.local.items()
+        }
+
+    async def count(self) -> int:
+        """Number of active sessions, across all workers when Redis is available"""
+        if self._redis:
+            try:
+                now = time.time()
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.zremrangebyscore(_SESSION_INDEX_KEY, "-inf", now)  # Drop sessions of dead workers
+                    pipe.zcard(_SESSION_INDEX_KEY)
+                    _, count = await pipe.execute()
+                return count
+            except Exception as e:
+                logger.warning(f"Failed to count sessions in Redis, reporting this worker only: {e}")
+        return len(self.local)
+
+# Global session registry instance
+_session_registry = None
+
+def get_session_registry() -> SessionRegistry:
+    """Get a singleton SessionRegistry instance"""
+    global _session_registry
+    if _session_registry is None:
+        _session_registry = SessionRegistry(os.getenv("REDIS_URL"))
+    return _session_registry
@@ -8,6 +8,9 @@ from gmail_service import get_gmail_service, EmailMessage
 
 logger = logging.getLogger(__name__)
 
+# Phrases that signal the caller wants an email sent; without one no email action is taken
+EMAIL_INTENT_RE = re.compile(r'\b(?:send|write|compose|email)\s+(?:an?\s+)?email\b', re.IGNORECASE)
+
 class VoiceEmailHandler:
     """Handles email-related voice commands and sends emails via Gmail API"""
 
@@ -21,7 +24,6 @@ class VoiceEmailHandler:
         # Common patterns for email extraction
         patterns = {
             'email_addresses': r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b',
-            'send_email_trigger': r'\b(?:send|write|compose|email)\s+(?:an?\s+)?email\b',
             'subject_pattern': r'\b(?:subject|title|regarding|about)(?:\s+is)?\s*[:\-]?\s*(.+?)(?:\s+(?:body|message|content|text)|$)',
             'recipient_pattern': r'\b(?:to|send\s+to|email\s+to|recipient)\s*[:\-]?\s*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
             'body_pattern': r'\b(?:body|message|content|text|saying|write)(?:\s+is)?\s*[:\-]?\s*(.+)',
@@ -36,7 +38,7 @@ class VoiceEmailHandler:
         }
 
         # Check for email intent
-        if re.search(patterns['send_email_trigger'], text, re.IGNORECASE):
+        if EMAIL_INTENT_RE.search(text):
             result['has_email_intent'] = True
 
         # Find email addresses
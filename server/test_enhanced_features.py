@@ -7,13 +7,14 @@ Test script for enhanced voice agent features
 import asyncio
 import sys
 import os
+import tempfile
 from datetime import datetime, timedelta
 
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from calendar_service import CalendarService
-from call_logger import CallLogger, CallType, CustomerType, CallStatus
+from call_logger import CallLogger, SQLiteCallLogger, CallType, CustomerType, CallStatus
 from language_support import LanguageManager, SupportedLanguage
 
 async def test_calendar_availability():
@@ -87,6 +88,125 @@ def test_call_logging():
         print(f"❌ Call logging test failed: {e}")
         return False
 
+def test_call_log_quoted_update():
+    """Test updating a call record whose fields contain quotes and newlines"""
+    print("\n✏️ Testing Call Log Update With Quoted Newlines...")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'call_logs.csv')
+            call_logger = CallLogger(csv_path)
+
+            summary = 'Patient said "please call back"\nafter 5 PM, not before'
+            first_id = call_logger.log_call({'customer_name': 'Quoted Patient', 'call_summary': summary})
+            second_id = call_logger.log_call({'customer_name': 'Next Patient', 'call_summary': 'Plain summary'})
+
+            assert call_logger.update_call(first_id, {'resolution_status': CallStatus.RESOLVED.value})
+            calls = {call['call_id']: call for call in call_logger.get_recent_calls(10)}
+            assert calls[first_id]['call_summary'] == summary
+            assert calls[first_id]['resolution_status'] == CallStatus.RESOLVED.value
+            assert calls[second_id]['call_summary'] == 'Plain summary'
+
+            # A fresh logger rebuilds the offset index from the file
+            call_logger.close()
+            call_logger = CallLogger(csv_path)
+            assert call_logger.update_call(second_id, {'agent_notes': 'Called "back"\ntwice'})
+            calls = {call['call_id']: call for call in call_logger.get_recent_calls(10)}
+            assert calls[first_id]['call_summary'] == summary
+            assert calls[second_id]['agent_notes'] == 'Called "back"\ntwice'
+
+            # Without index hints, a later ID quoted inside an earlier record mustn't be matched
+            call_logger.log_calls_batch([
+                {'call_id': 'quoted01', 'agent_notes': 'Note\nlater01,"looks like" a record'},
+                {'call_id': 'later01', 'agent_notes': 'Real record'},
+            ])
+            call_logger._offset_index.clear()
+            assert call_logger.update_call('later01', {'call_summary': 'Found the real record'})
+            calls = {call['call_id']: call for call in call_logger.get_recent_calls(10)}
+            assert calls['quoted01']['agent_notes'] == 'Note\nlater01,"looks like" a record'
+            assert calls['later01']['call_summary'] == 'Found the real record'
+            call_logger.close()
+
+        print("✅ Quoted multi-line record updated without disturbing its neighbour")
+        return True
+
+    except Exception as e:
+        print(f"❌ Call log quoted update test failed: {e!r}")
+        return False
+
+def test_call_log_resizing_updates():
+    """Test an update that changes a record's length, then an update to a later record"""
+    print("\n📏 Testing Call Log Updates That Shift Later Records...")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            call_logger = CallLogger(os.path.join(tmp, 'call_logs.csv'))
+            call_ids = call_logger.log_calls_batch([
+                {'customer_name': f'Patient {i}', 'call_summary': f'Summary {i}'} for i in range(3)
+            ])
+
+            # Grow the first record, then shrink it, updating the last record after each
+            assert call_logger.update_call(call_ids[0], {'agent_notes': 'x' * 500})
+            assert call_logger.update_call(call_ids[2], {'call_summary': 'Updated after growth'})
+            assert call_logger.update_call(call_ids[0], {'agent_notes': ''})
+            assert call_logger.update_call(call_ids[2], {'resolution_status': CallStatus.ESCALATED.value})
+
+            calls = call_logger.get_recent_calls(10)
+            assert [call['call_id'] for call in calls] == call_ids
+            assert calls[0]['agent_notes'] == ''
+            assert calls[1]['call_summary'] == 'Summary 1'
+            assert calls[2]['call_summary'] == 'Updated after growth'
+            assert calls[2]['resolution_status'] == CallStatus.ESCALATED.value
+            assert not call_logger.update_call('missing', {'agent_notes': 'x'})
+            call_logger.close()
+
+        print("✅ Later records found and updated after length changes")
+        return True
+
+    except Exception as e:
+        print(f"❌ Call log resizing update test failed: {e!r}")
+        return False
+
+def test_call_stats_backend_parity():
+    """Test that the CSV and SQLite backends report the same call statistics"""
+    print("\n⚖️ Testing Call Stats Parity Between CSV and SQLite...")
+
+    try:
+        old_timestamp = (datetime.now() - timedelta(days=40)).isoformat()
+        calls = [
+            {'call_type': CallType.APPOINTMENT_BOOKING.value, 'customer_type': CustomerType.NEW.value,
+             'department_enquired': 'Cardiology', 'doctor_enquired': 'Dr. Rajesh Kumar', 'duration_seconds': 120},
+            {'call_type': CallType.APPOINTMENT_BOOKING.value, 'language_used': 'hindi',
+             'department_enquired': 'Cardiology', 'duration_seconds': 'n/a',
+             'call_summary': 'Multi-line,\n"quoted" summary'},
+            {'call_type': CallType.GENERAL_ENQUIRY.value, 'resolution_status': CallStatus.RESOLVED.value,
+             'duration_seconds': 45},
+            {'call_type': CallType.EMERGENCY.value, 'timestamp': old_timestamp, 'duration_seconds': 999},
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_logger = CallLogger(os.path.join(tmp, 'call_logs.csv'))
+            sqlite_logger = SQLiteCallLogger(os.path.join(tmp, 'call_logs.db'))
+            for call_data in calls:
+                csv_logger.log_call(dict(call_data))
+                sqlite_logger.log_call(dict(call_data))
+
+            for days in (1, 60):
+                csv_stats = csv_logger.get_call_stats(days=days)
+                sqlite_stats = sqlite_logger.get_call_stats(days=days)
+                assert csv_stats == sqlite_stats, f"{days} days: {csv_stats} != {sqlite_stats}"
+
+            assert csv_logger.get_call_stats(days=1)['total_calls'] == 3
+            csv_logger.close()
+            sqlite_logger.close()
+
+        print("✅ CSV and SQLite statistics match")
+        return True
+
+    except Exception as e:
+        print(f"❌ Call stats parity test failed: {e!r}")
+        return False
+
 def test_language_support():
     """Test multi-language support"""
     print("\n🌐 Testing Multi-Language Support...")
@@ -229,6 +349,9 @@ async def main():
         ("Enhanced Functions", test_enhanced_functions),
         ("Language Support", test_language_support),
         ("Call Logging", test_call_logging),
+        ("Call Log Quoted Update", test_call_log_quoted_update),
+        ("Call Log Resizing Updates", test_call_log_resizing_updates),
+        ("Call Stats Backend Parity", test_call_stats_backend_parity),
         ("Calendar Availability", test_calendar_availability),
         ("Appointment Cancellation", test_appointment_cancellation),
     ]